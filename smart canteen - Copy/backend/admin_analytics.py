@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from database import get_db
 from dependencies import get_current_user
-from models import User
+from models import User, Order, OrderItem, MenuItem
+from services.site_counters import SiteCounters
+from datetime import datetime, timedelta
 import random
 
 router = APIRouter(
@@ -11,15 +14,18 @@ router = APIRouter(
 )
 
 @router.get("/dashboard-stats")
-async def get_admin_dashboard_stats(current_user: User = Depends(get_current_user)):
+def get_admin_dashboard_stats(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     # Verify admin role
     if current_user.role != "ADMIN":
         return {"error": "Unauthorized"}
-        
+
+    # Counters maintained in the order transaction: a few primary-key reads, no scan of orders
+    today = SiteCounters.read_day(db)
     return {
-        "orders_today": 1245,
-        "revenue_today": 8430,
-        "risk_alerts": 3,
+        "orders_today": today["orders"],
+        "revenue_today": today["revenue"],
+        "risk_alerts": today["risk_alerts"],
+        "orders_by_hour": today["by_hour"],
         "system_health": 98,
         "user_health_trend": [
             {"date": "Nov 01", "score": 82},
@@ -57,3 +63,49 @@ async def get_risk_flags(current_user: User = Depends(get_current_user)):
             "image": "https://images.unsplash.com/photo-1626555806689-fb53641fbdec?w=100&h=100&fit=crop"
         }
     ]
+
+@router.get("/popular-items")
+def get_popular_items(
+    days: int = Query(30, ge=1, le=365),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Best-selling items over the last `days` days, aggregated in SQL from order_items."""
+    if current_user.role != "ADMIN":
+        return {"error": "Unauthorized"}
+
+    since = datetime.now() - timedelta(days=days)
+    units = func.sum(OrderItem.qty)
+    rows = db.query(
+        OrderItem.item_id,
+        MenuItem.name,
+        units.label("units"),
+        func.count(func.distinct(OrderItem.order_id)).label("orders"),
+        func.sum(OrderItem.qty * OrderItem.price).label("revenue"),
+        func.sum(OrderItem.qty * OrderItem.sugar).label("sugar"),
+        func.sum(OrderItem.qty * OrderItem.sodium).label("sodium")
+    ).join(
+        Order, Order.id == OrderItem.order_id
+    ).outerjoin(
+        MenuItem, MenuItem.id == OrderItem.item_id
+    ).filter(
+        Order.created_at >= since
+    ).group_by(
+        OrderItem.item_id
+    ).order_by(
+        units.desc()
+    ).limit(limit).all()
+
+    return [
+        {
+            "item_id": row.item_id,
+            "name": row.name,
+            "units": row.units,
+            "orders": row.orders,
+            "revenue": row.revenue or 0,
+            "total_sugar": row.sugar or 0,
+            "total_sodium": row.sodium or 0
+        }
+        for row in rows
+    ]
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from dependencies import get_current_user
 from models import User
-from analytics.nutrition_aggregator import NutritionAggregator
-from datetime import datetime, timedelta
+from services.nutrition_aggregator import NutritionAggregator
+from services.escalation_memo import escalation_memo
+from services.health_timeline import HealthTimeline
 
 router = APIRouter(
     prefix="/api/analytics",
@@ -13,25 +14,12 @@ router = APIRouter(
 
 @router.get("/nutrition")
 async def get_nutrition_analytics(
-    days: int = Query(7),
+    days: int = Query(7, ge=1, le=366),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Generates mock nutrition data based on days
-    daily_data = []
-    base_date = datetime.now()
-    
-    for i in range(days):
-        date = base_date - timedelta(days=days-1-i)
-        daily_data.append({
-            "day": date.strftime("%Y-%m-%d"),
-            "day_name": date.strftime("%a"),
-            "calories": random.randint(1800, 2400),
-            "protein": random.randint(50, 100),
-            "carbs": random.randint(200, 300),
-            "fat": random.randint(40, 80),
-            "sugar": random.randint(30, 60),
-            "sodium": random.randint(1500, 2500)
-        })
+    # Real per-day totals from the daily_nutrition rollup, zero-filled
+    daily_data = await db.run_sync(NutritionAggregator.get_nutrition_series, current_user.id, days)
     
     return {
         "daily_data": daily_data,
@@ -50,10 +38,16 @@ async def get_nutrition_analytics(
         }
     }
 
-@router.get("/risk")
-async def get_health_risks(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    escalation_data = NutritionAggregator.check_risk_escalation(db, current_user.id)
-    
+async def load_escalation(db: AsyncSession, user_id):
+    """check_risk_escalation for a user, memoized briefly across the analytics endpoints."""
+    escalation_data, epoch = escalation_memo.get(user_id)
+    if escalation_data is None:
+        escalation_data = await db.run_sync(NutritionAggregator.check_risk_escalation, user_id)
+        escalation_memo.put(user_id, escalation_data, epoch)
+    return escalation_data
+
+
+def build_risks(escalation_data):
     risks = []
     if escalation_data["escalated"]:
         for warning in escalation_data["warnings"]:
@@ -73,9 +67,8 @@ async def get_health_risks(db: Session = Depends(get_db), current_user: User = D
         
     return risks
 
-@router.get("/prediction")
-async def get_health_predictions(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    escalation_data = NutritionAggregator.check_risk_escalation(db, current_user.id)
+
+def build_predictions(escalation_data):
     predictions = []
     
     if escalation_data["escalated"]:
@@ -98,15 +91,31 @@ async def get_health_predictions(db: Session = Depends(get_db), current_user: Us
         })
     return predictions
 
+
+@router.get("/risk")
+async def get_health_risks(db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    return build_risks(await load_escalation(db, current_user.id))
+
+@router.get("/prediction")
+async def get_health_predictions(db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    return build_predictions(await load_escalation(db, current_user.id))
+
+@router.get("/summary")
+async def get_analytics_summary(db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    # Dashboard in one round trip: risks, predictions and metrics from a single evaluation
+    escalation_data = await load_escalation(db, current_user.id)
+    return {
+        "escalated": escalation_data["escalated"],
+        "risks": build_risks(escalation_data),
+        "predictions": build_predictions(escalation_data),
+        "metrics": escalation_data.get("current_metrics", {})
+    }
+
 @router.get("/timeline")
-async def get_health_timeline(current_user: User = Depends(get_current_user)):
-    base_date = datetime.now()
-    timeline = []
-    for i in range(10):
-        date = base_date - timedelta(days=i*2)
-        timeline.append({
-            "date": date.strftime("%b %d"),
-            "score": random.randint(75, 95),
-            "event": "Profile Updated" if i == 9 else ("High Sodium Day" if i % 3 == 0 else "Optimal Nutrition")
-        })
-    return timeline[::-1]
+async def get_health_timeline(
+    days: int = Query(14, ge=1, le=366),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Stored daily scores (new completed days are appended first) plus a live point for today
+    return await db.run_sync(HealthTimeline.get_timeline, current_user.id, days)
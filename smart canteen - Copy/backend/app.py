@@ -9,13 +9,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, Response
-from database import engine, Base
+from database import engine, async_engine, SessionLocal
+from migrations.runner import run_migrations
 import os
 import models
 
-# Create all database tables
-Base.metadata.create_all(bind=engine)
-
 # Initialize FastAPI application
 app = FastAPI(
     title="HealthBite Smart Canteen",
@@ -51,6 +49,33 @@ async def add_security_headers(request, call_next):
     response.headers["X-XSS-Protection"] = "1; mode=block"
     return response
 
+@app.on_event("startup")
+def migrate_database():
+    # Bring the schema up to date before serving (set MIGRATE_ON_STARTUP=0 when
+    # migrations are run separately with migrate_db.py, e.g. multi-worker deploys)
+    if os.environ.get("MIGRATE_ON_STARTUP", "1") != "0":
+        run_migrations(engine)
+
+@app.on_event("startup")
+def warm_menu_catalog():
+    # Load the menu before serving, so async routes never wait on the first catalog load
+    from menu import menu_catalog
+    db = SessionLocal()
+    try:
+        menu_catalog.snapshot(db)
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    # Stop the password hashing worker processes with the server
+    from services.password_hasher import password_hasher
+    password_hasher.shutdown()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_engine.dispose()
+
 # --- Import and Register Routers ---
 from auth import router as auth_router
 from health import router as health_router
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import User
 from schemas import UserCreate, UserResponse, LoginRequest, LoginResponse, RoleEnum, ForgotPasswordRequest, ResetPasswordRequest
-from database import get_db
+from database import get_async_db
+from services.token_cache import token_cache
+from services.password_hasher import password_hasher
 from jose import jwt
 import os
 from datetime import datetime, timedelta
@@ -25,19 +27,19 @@ if not SECRET_KEY or SECRET_KEY == "your-secret-key-change-in-production":
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Password hashing runs in a process pool (services/password_hasher.py); these routes
+# are async, so every database call goes through the AsyncSession and never blocks the loop
 
 # Password validation regex
 PASSWORD_REGEX = r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[^A-Za-z0-9]).{8,}$"
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     User login endpoint
     """
-    user = db.query(User).filter(User.email == request.email).first()
+    user = await find_user(db, request.email)
 
     if not user:
         raise HTTPException(
@@ -47,7 +49,7 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
         )
 
     # Verify password
-    if not pwd_context.verify(request.password, user.hashed_password):
+    if not await password_hasher.verify(request.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
@@ -80,12 +82,12 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/register", response_model=LoginResponse)
-def register(request: UserCreate, db: Session = Depends(get_db)):
+async def register(request: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     User registration endpoint
     """
     # Check if email already exists
-    existing_user = db.query(User).filter(User.email == request.email).first()
+    existing_user = await find_user(db, request.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -106,7 +108,7 @@ def register(request: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Hash the password before storing
-    hashed = pwd_context.hash(request.password)
+    hashed = await password_hasher.hash(request.password)
 
     # Create new user
     db_user = User(
@@ -117,8 +119,8 @@ def register(request: UserCreate, db: Session = Depends(get_db)):
         disabled=0
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     # Create access token
     # Create access token
@@ -142,12 +144,12 @@ def register(request: UserCreate, db: Session = Depends(get_db)):
 async def forgot_password(
     request: ForgotPasswordRequest, 
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Initiate password reset process
     """
-    user = db.query(User).filter(User.email == request.email).first()
+    user = await find_user(db, request.email)
     if not user:
         # Don't reveal if user exists for security, just return success
         return {"message": "If this email is registered, you will receive a reset link shortly."}
@@ -165,7 +167,7 @@ async def forgot_password(
 
 
 @router.post("/reset-password", response_model=dict)
-def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db)):
+async def reset_password(request: ResetPasswordRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Reset password using valid token
     """
@@ -183,7 +185,7 @@ def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db))
             detail="Invalid or expired reset token"
         )
 
-    user = db.query(User).filter(User.email == email).first()
+    user = await find_user(db, email)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
@@ -201,10 +203,22 @@ def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db))
         )
 
     # Hash new password and save
-    hashed = pwd_context.hash(request.new_password)
+    hashed = await password_hasher.hash(request.new_password)
     user.hashed_password = hashed
-    db.commit()
+    await db.commit()
+    # Sessions authenticated before the reset must go back through the users table
+    token_cache.invalidate_user(user.id)
 
     return {"message": "Password reset successful"}
 
 
+async def find_user(db: AsyncSession, email):
+    """
+    User row for an email, or None. Ends the read transaction so the pooled
+    connection is free while the caller waits on the password hasher; the row
+    stays loaded (expire_on_commit=False) and later changes still flush on commit.
+    """
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
+    await db.commit()
+    return user
@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from chatbot_engine import HealthChatbot
-from database import get_db
+from database import get_async_db
 from dependencies import get_current_user
-from models import User, HealthProfile
-from menu import FOOD_ITEMS
-import json
+from models import User
+from menu import FOOD_ITEMS, menu_catalog, load_health_profile
+from services.profile_cache import parse_profile
 
 router = APIRouter(prefix="/api/chatbot", tags=["Chatbot"])
 
@@ -15,7 +15,7 @@ chatbot_engine = HealthChatbot({}, FOOD_ITEMS, [])
 @router.post("/query")
 async def chatbot_query(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     try:
@@ -23,21 +23,21 @@ async def chatbot_query(
         message = data.get('message', '')
         context = data.get('context', {})
         
+        # Keep the engine on the current menu catalog snapshot
+        menu = await menu_catalog.snapshot_async(db)
+        chatbot_engine.use_menu(menu.items, menu.keyword_index)
+        
         # Fetch user's actual health profile
-        db_profile = db.query(HealthProfile).filter(HealthProfile.user_id == current_user.id).first()
+        db_profile = await load_health_profile(db, current_user.id)
         
         profile_data = {}
         if db_profile:
-            try:
-                diseases = json.loads(db_profile.disease) if db_profile.disease else []
-            except:
-                diseases = []
-                
+            parsed = parse_profile(db_profile)
             profile_data = {
                 "age": db_profile.age,
                 "bmi": db_profile.bmi,
-                "disease": diseases,
-                "allergies": db_profile.allergies
+                "disease": parsed.disease,
+                "allergies": parsed.allergies
             }
         
         # Get response from engine with real profile data
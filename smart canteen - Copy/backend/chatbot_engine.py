@@ -1,12 +1,15 @@
 import random # nosec
 from datetime import datetime
 import re
+from services.keyword_matcher import MenuKeywordIndex
 
 class HealthChatbot:
-    def __init__(self, user_profiles, menu_db, orders_db):
+    def __init__(self, user_profiles, menu_db, orders_db, keyword_index=None):
         self.user_profiles = user_profiles
         self.menu_db = menu_db
         self.orders_db = orders_db
+        # Diet/allergen keyword tags precompiled once for the menu
+        self.keyword_index = keyword_index or MenuKeywordIndex(menu_db)
         
         self.intents = {
             'greeting': [r'hi', r'hello', r'hey', r'start', r'wake up'],
@@ -31,6 +34,12 @@ class HealthChatbot:
             ]
         }
 
+    def use_menu(self, menu_db, keyword_index):
+        """Swap in a new menu (and its precompiled keyword index) after a catalog reload"""
+        if menu_db is not self.menu_db:
+            self.menu_db = menu_db
+            self.keyword_index = keyword_index
+
     def detect_intent(self, message):
         message = message.lower()
         for intent, patterns in self.intents.items():
@@ -99,14 +108,14 @@ class HealthChatbot:
         diet = profile.get('dietary_preference', 'Non-Veg')
         food_name = food_item['name'].lower()
         
-        meat_keywords = ['chicken', 'beef', 'fish', 'salmon', 'pepperoni', 'meat', 'bacon', 'ham', 'tacos', 'lasagna', 'burger']
-        dairy_keywords = ['cheese', 'milk', 'yogurt', 'cream', 'carbonara', 'egg', 'custard', 'donut', 'cake']
+        food_tags = self.keyword_index.tags(food_name)
+        is_meat = "meat" in food_tags or "meat_dish" in food_tags
         
         if diet == 'Vegan':
-            if any(k in food_name for k in meat_keywords + dairy_keywords):
+            if is_meat or "dairy" in food_tags:
                 return 0, ["Violates Vegan restriction"]
         elif diet == 'Veg':
-             if any(k in food_name for k in meat_keywords):
+             if is_meat:
                 return 0, ["Violates Vegetarian restriction"]
 
         # 2. Hard Filtering - Allergies
@@ -122,9 +131,10 @@ class HealthChatbot:
         if isinstance(allergies, list):
             for alg in allergies:
                 alg_name = alg.get('name', '').lower()
-                if alg.get('severity') == 'Severe' and alg_name in food_name:
+                contains_allergen = self.keyword_index.contains(food_name, alg_name)
+                if alg.get('severity') == 'Severe' and contains_allergen:
                     return 0, [f"Blocked: Severe {alg['name']} allergy"]
-                elif alg_name and alg_name in food_name:
+                elif alg_name and contains_allergen:
                     score -= 40
                     penalties.append(f"Caution: Contains {alg.get('name')}")
 
@@ -1,11 +1,17 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from models import User
-from database import get_db
+from database import get_async_db
 from jose import JWTError, jwt
+from services.token_cache import token_cache
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 # JWT configuration - In production, use environment variables
 # JWT configuration - Required in production
 SECRET_KEY = os.environ.get("JWT_SECRET_KEY")
@@ -17,47 +23,14 @@ ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-from datetime import datetime
-from collections import defaultdict
-
-# Simple In-Memory Rate Limiter Config
-# Dictionary of {ip/user: [timestamp1, timestamp2, ...]}
-rate_limit_store = defaultdict(list)
-RATE_LIMIT_REQUESTS = 10
-RATE_LIMIT_WINDOW_SEC = 60
-
-async def check_rate_limit(
-    current_user: User = Depends(get_current_user)
-):
-    """
-    Dependency to enforce rate limiting primarily on sensitive routes like Health records.
-    Limits to RATE_LIMIT_REQUESTS per RATE_LIMIT_WINDOW_SEC per user ID.
-    """
-    user_key = f"user_{current_user.id}"
-    now = datetime.now()
-    
-    # Filter valid timestamps within the last window
-    valid_times = [t for t in rate_limit_store[user_key] if (now - t).total_seconds() <= RATE_LIMIT_WINDOW_SEC]
-    
-    if len(valid_times) >= RATE_LIMIT_REQUESTS:
-        raise HTTPException(
-            status_code=429,
-            detail="Too many requests. Please try again later."
-        )
-        
-    # Valid request, append time and update store
-    valid_times.append(now)
-    rate_limit_store[user_key] = valid_times
-    
-    return True
-
-
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get current authenticated user from JWT token
+    Get current authenticated user from JWT token.
+    The user belongs to the request's async session; sync routes that modify it
+    must db.merge() it into their own session first.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -65,22 +38,67 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    # Fast path: token seen recently -> no jwt.decode and no users table query
+    cached = token_cache.get(token)
+    if cached is not None:
+        claims, snapshot = cached
+        # Attach a copy to this request's session without a SELECT; writes to it still flush normally
+        return await db.merge(snapshot, load=False)
+
     try:
         # Decode JWT token
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print(f"DEBUG: JWT Payload: {payload}")
+        logger.debug("JWT payload: %s", payload)
         email: str = payload.get("sub")
         if email is None:
-            print("DEBUG: email (sub) is None in payload")
+            logger.debug("JWT payload has no subject (sub)")
             raise credentials_exception
     except JWTError as e:
-        print(f"DEBUG: JWT Decode Error: {str(e)}")
+        logger.debug("JWT decode error: %s", e)
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
     if user is None:
-        print(f"DEBUG: User not found for email: {email}")
+        logger.debug("User not found for email: %s", email)
         raise credentials_exception
     
+    token_cache.put(token, payload, snapshot_user(user))
+    # Hand the connection back to the pool; the row stays loaded (expire_on_commit=False)
+    await db.commit()
     return user
 
+
+def snapshot_user(user):
+    """Detached, session-independent copy of a User row's columns (safe to share between requests)."""
+    snapshot = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+from services.rate_limiter import RateLimiter, build_backend
+
+# Sliding-window rate limiter config
+# Storage is chosen by RATE_LIMIT_BACKEND (memory | sqlite); sqlite shares limits across workers
+RATE_LIMIT_REQUESTS = 10
+RATE_LIMIT_WINDOW_SEC = 60
+rate_limiter = RateLimiter(RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW_SEC, build_backend())
+
+def check_rate_limit(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Dependency to enforce rate limiting primarily on sensitive routes like Health records.
+    Limits to RATE_LIMIT_REQUESTS per RATE_LIMIT_WINDOW_SEC per user ID.
+    Plain def: FastAPI runs it in the threadpool, so a SQLite backend waiting
+    on its write lock never blocks the event loop.
+    """
+    user_key = f"user_{current_user.id}"
+    
+    if not rate_limiter.allow(user_key):
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests. Please try again later."
+        )
+    
+    return True
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, Request, Response
 from sqlalchemy.orm import Session
 from models import User, HealthProfile, DailyLog
 from schemas import HealthProfileCreate, HealthProfileResponse, DailyLogCreate, DailyLogResponse, HealthStep1, HealthStep2, HealthReportResponse
@@ -14,6 +14,12 @@ router = APIRouter(
 )
 
 from services.risk_engine import get_bmi_category, calculate_status, calculate_overall_risk
+from services.recommendation_cache import recommendation_cache
+from services.token_cache import token_cache
+from services.escalation_memo import escalation_memo
+from services.health_timeline import HealthTimeline
+from services.profile_cache import parse_profile
+from http_cache import make_etag, etag_matches, not_modified, set_etag
 
 @router.post("/profile", response_model=dict)
 def create_health_profile(
@@ -49,20 +55,35 @@ def create_health_profile(
     score, level = calculate_overall_risk(db_profile)
     db_profile.risk_score = score
     db_profile.risk_level = level
+    db_profile.version = (db_profile.version or 0) + 1
     
-    current_user.profile_completed = 1
-    current_user.onboarding_step = 3
+    # current_user belongs to the auth (async) session; update the row through this one
+    user = db.merge(current_user)
+    user.profile_completed = 1
+    user.onboarding_step = 3
+    HealthTimeline.mark_profile_update(db, current_user.id)
     db.commit()
+    recommendation_cache.invalidate_user(current_user.id)
+    token_cache.invalidate_user(current_user.id)
+    escalation_memo.invalidate_user(current_user.id)
     return format_health_profile(db_profile, current_user.name)
 
 @router.get("/profile", response_model=dict)
 def get_health_profile(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     profile = db.query(HealthProfile).filter(HealthProfile.user_id == current_user.id).first()
     if not profile:
         raise HTTPException(status_code=404, detail="Health profile not found")
+
+    # The body also carries the user's name, which lives outside the profile row
+    etag = make_etag("profile", current_user.id, profile.version or 0, current_user.name)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return format_health_profile(profile, current_user.name)
 
 @router.get("/check", response_model=dict)
@@ -101,9 +122,16 @@ def save_step1(
     profile.bmi = bmi
     profile.bmi_category = bmi_cat
     profile.dietary_preference = data.dietary_preference
+    profile.version = (profile.version or 0) + 1
     
-    current_user.onboarding_step = 1
+    # current_user belongs to the auth (async) session; update the row through this one
+    user = db.merge(current_user)
+    user.onboarding_step = 1
+    HealthTimeline.mark_profile_update(db, current_user.id)
     db.commit()
+    recommendation_cache.invalidate_user(current_user.id)
+    token_cache.invalidate_user(current_user.id)
+    escalation_memo.invalidate_user(current_user.id)
     return {"message": "Step 1 saved", "bmi": bmi, "bmi_category": bmi_cat}
 
 @router.post("/step2")
@@ -124,9 +152,16 @@ def save_step2(
     
     profile.diabetes_status = calculate_status("diabetes", data.health_values.get("diabetes", 0))
     profile.bp_status = calculate_status("hypertension", data.health_values.get("hypertension", 0))
+    profile.version = (profile.version or 0) + 1
     
-    current_user.onboarding_step = 2
+    # current_user belongs to the auth (async) session; update the row through this one
+    user = db.merge(current_user)
+    user.onboarding_step = 2
+    HealthTimeline.mark_profile_update(db, current_user.id)
     db.commit()
+    recommendation_cache.invalidate_user(current_user.id)
+    token_cache.invalidate_user(current_user.id)
+    escalation_memo.invalidate_user(current_user.id)
     return {"message": "Step 2 saved"}
 
 @router.post("/finalize")
@@ -141,14 +176,23 @@ def finalize_profile(
     score, level = calculate_overall_risk(profile)
     profile.risk_score = score
     profile.risk_level = level
+    profile.version = (profile.version or 0) + 1
     
-    current_user.profile_completed = 1
-    current_user.onboarding_step = 3
+    # current_user belongs to the auth (async) session; update the row through this one
+    user = db.merge(current_user)
+    user.profile_completed = 1
+    user.onboarding_step = 3
+    HealthTimeline.mark_profile_update(db, current_user.id)
     db.commit()
+    recommendation_cache.invalidate_user(current_user.id)
+    token_cache.invalidate_user(current_user.id)
+    escalation_memo.invalidate_user(current_user.id)
     return {"message": "Profile finalized", "risk_score": score, "risk_level": level}
 
 @router.get("/report", response_model=HealthReportResponse)
 def get_health_report(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -156,17 +200,14 @@ def get_health_report(
     if not profile or current_user.profile_completed == 0:
         raise HTTPException(status_code=404, detail="Completed profile not found")
 
-    try:
-        diseases = json.loads(profile.disease) if profile.disease else []
-        allergies = json.loads(profile.allergies) if profile.allergies and profile.allergies != "None" else []
-    except json.JSONDecodeError as e:
-        print(f"Error parsing report data JSON: {e}")
-        diseases = []
-        allergies = []
-    except Exception as e:
-        print(f"Unexpected error loading report data: {e}")
-        diseases = []
-        allergies = []
+    etag = make_etag("report", current_user.id, profile.version or 0)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    parsed = parse_profile(profile)
+    diseases = parsed.disease
+    allergies = parsed.allergies
 
     recs = ["Stay hydrated with 3L water daily.", "Maintain a regular sleep cycle."]
     if "Diabetes" in [d.capitalize() for d in diseases]:
@@ -222,18 +263,9 @@ def get_daily_log(
     return log or {"water_intake_ml": 0, "steps": 0, "mood": "Neutral"}
 
 def format_health_profile(profile, user_name="User"):
-    """Convert database profile to response format with JSON parsing"""
-    try:
-        disease_list = json.loads(profile.disease) if profile.disease else []
-        severity_dict = json.loads(profile.severity) if profile.severity else {}
-        health_values_dict = json.loads(profile.health_values) if profile.health_values else {}
-        allergies_list = json.loads(profile.allergies) if profile.allergies and profile.allergies != "None" else []
-    except (json.JSONDecodeError, TypeError):
-        disease_list = []
-        severity_dict = {}
-        health_values_dict = {}
-        allergies_list = []
-    
+    """Convert database profile to response format (JSON columns come from the parsed-profile cache)"""
+    parsed = parse_profile(profile)
+
     return {
         "id": profile.id,
         "user_id": profile.user_id,
@@ -244,14 +276,14 @@ def format_health_profile(profile, user_name="User"):
         "bmi": profile.bmi,
         "gender": profile.gender,
         "dietary_preference": profile.dietary_preference,
-        "disease": disease_list,
-        "severity": severity_dict,
-        "health_values": health_values_dict,
+        "disease": parsed.disease,
+        "severity": parsed.severity,
+        "health_values": parsed.health_values,
         "diabetes_status": profile.diabetes_status,
         "bp_status": profile.bp_status,
         "cholesterol_status": profile.cholesterol_status,
         "bmi_category": profile.bmi_category or get_bmi_category(profile.bmi or 0),
         "risk_score": profile.risk_score or 0,
         "risk_level": profile.risk_level or "Low",
-        "allergies": allergies_list
+        "allergies": parsed.allergies
     }
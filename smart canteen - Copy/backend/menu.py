@@ -1,19 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db
 from dependencies import get_current_user
-from models import User, HealthProfile, Order
-from schemas import OrderCreate, OrderResponse
+from models import User, HealthProfile, Order, MenuItem
+from schemas import OrderCreate, OrderResponse, BulkOrderCreate, BulkOrderResponse, MenuItemCreate, MenuItemUpdate
 from services.recommendation_service import RecommendationService
 from services.order_service import OrderService
-import json
+from services.menu_catalog import MenuCatalog, menu_item_to_dict, with_live_stock
+from services.recommendation_cache import recommendation_cache, RecommendationCache
+from services.profile_cache import parse_profile
+from http_cache import make_etag, etag_matches, not_modified, set_etag
+from typing import Optional
+from operator import itemgetter
+import heapq
 
 router = APIRouter(
     prefix="/api/menu",
     tags=["menu"]
 )
 
-# Mock Food Data (Extended with nutrition for AI analysis)
+# Default menu (Extended with nutrition for AI analysis), seeded into menu_items on first start
 FOOD_ITEMS = [
     {"id": 101, "name": "Margherita Pizza", "price": 250, "image": "🍕", "calories": 650, "sugar": 8, "protein": 15, "sodium": 1200, "carbs": 80, "description": "Fresh mozzarella, basil & tomato sauce"},
     {"id": 102, "name": "Fresh Green Salad", "price": 180, "image": "🥗", "calories": 150, "sugar": 2, "protein": 5, "sodium": 150, "carbs": 10, "description": "Mixed greens with house dressing"},
@@ -47,61 +55,193 @@ FOOD_ITEMS = [
     {"id": 130, "name": "Greek Yogurt Plain", "price": 140, "image": "🍦", "calories": 100, "sugar": 0, "protein": 18, "sodium": 60, "carbs": 6, "description": "Creamy sugar-free greek yogurt"}
 ]
 
+# Database-backed menu; snapshots (id index, keyword tags, nutrient matrix) are rebuilt after menu writes
+menu_catalog = MenuCatalog(seed_items=FOOD_ITEMS)
+
 @router.get("/intelligent")
 async def get_intelligent_menu(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
+    menu = await menu_catalog.snapshot_async(db)
+    stock = await db.run_sync(MenuCatalog.stock_levels)
     # Get user profile
-    profile_db = db.query(HealthProfile).filter(HealthProfile.user_id == current_user.id).first()
-    
+    profile_db = await load_health_profile(db, current_user.id)
+
+    # Conditional GET: unchanged menu, stock and profile -> 304 without scoring
+    etag = make_etag("menu", menu.digest, sorted(stock.items()), current_user.id, profile_db.version if profile_db else "none")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    return with_live_stock(score_menu_for_user(menu, profile_db, current_user), stock)
+
+
+@router.get("/recommendations")
+async def get_recommendations(
+    k: int = Query(5, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    max_risk: int = Query(2, ge=0, le=2),
+    tag: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Top-K items by match_score, optionally filtered by risk level and tag.
+    Uses partial selection (heapq) instead of sorting the whole scored menu.
+    """
+    menu = await menu_catalog.snapshot_async(db)
+    profile_db = await load_health_profile(db, current_user.id)
+    scored = score_menu_for_user(menu, profile_db, current_user)
+
+    candidates = [
+        item for item in scored
+        if item['risk_level'] <= max_risk and (tag is None or item['tag'] == tag)
+    ]
+    # nlargest is stable, so equal scores keep menu order across pages
+    top = heapq.nlargest(offset + k, candidates, key=itemgetter('match_score'))
+
+    stock = await db.run_sync(MenuCatalog.stock_levels)
+    return {
+        "items": with_live_stock(top[offset:offset + k], stock),
+        "k": k,
+        "offset": offset,
+        "total": len(candidates)
+    }
+
+
+async def load_health_profile(db: AsyncSession, user_id):
+    result = await db.execute(select(HealthProfile).where(HealthProfile.user_id == user_id))
+    return result.scalars().first()
+
+
+def build_scoring_profile(profile_db):
+    """Profile dict consumed by RecommendationService (defaults if no profile exists)."""
     # Simple profile if none exists
-    profile = {
-        "age": 25,
-        "disease": [],
-        "allergies": [],
-        "dietary_preference": "Non-Veg",
+    if not profile_db:
+        return {
+            "age": 25,
+            "disease": [],
+            "allergies": [],
+            "dietary_preference": "Non-Veg",
+            "target_calories": 2000
+        }
+
+    parsed = parse_profile(profile_db)
+
+    return {
+        "age": profile_db.age,
+        "bmi": profile_db.bmi,
+        "disease": parsed.disease,
+        "severity": parsed.severity,
+        "allergies": parsed.allergies,
+        "dietary_preference": profile_db.dietary_preference or "Non-Veg",
         "target_calories": 2000
     }
-    
-    if profile_db:
-        try:
-            diseases = json.loads(profile_db.disease) if profile_db.disease else []
-            allergies = json.loads(profile_db.allergies) if profile_db.allergies and profile_db.allergies != "None" else []
-        except:
-            diseases = []
-            allergies = []
-        
-        profile = {
-            "age": profile_db.age,
-            "disease": diseases,
-            "allergies": allergies,
-            "dietary_preference": profile_db.dietary_preference or "Non-Veg",
-            "target_calories": 2000 
-        }
+
+
+def score_menu_for_user(menu, profile_db, current_user):
+    """Scored menu for a user, served from the recommendation cache when possible."""
+    profile = build_scoring_profile(profile_db)
+
+    # Scored menus only depend on the profile shape and the menu version
+    cache_key = (RecommendationCache.fingerprint(profile), menu.version)
+    intelligent_menu = recommendation_cache.get(cache_key, user_id=current_user.id)
+    if intelligent_menu is not None:
+        return intelligent_menu
 
     # Initialize Recommendation Service
-    recommender = RecommendationService(alpha=0.6)
-    
-    # Get intelligent menu (applies stock/availability filters internally)
-    intelligent_menu = recommender.get_intelligent_menu(FOOD_ITEMS, profile)
-        
+    recommender = RecommendationService(alpha=0.6, keyword_index=menu.keyword_index)
+
+    # Batch-score the whole menu (applies stock/availability filters internally)
+    intelligent_menu = recommender.score_menu(menu.matrix, profile)
+    recommendation_cache.put(cache_key, intelligent_menu, user_id=current_user.id)
+
     return intelligent_menu
 
 
 @router.post("/order")
 async def place_order(
     order_data: OrderCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    new_order = OrderService.create_order(db, current_user, order_data, FOOD_ITEMS)
+    # Make sure the catalog is loaded, then run stock reservation + insert
+    # as one sync unit of work on the async connection
+    await menu_catalog.snapshot_async(db)
+    new_order = await db.run_sync(OrderService.create_order, current_user, order_data, menu_catalog)
     return new_order
 
+@router.post("/order/bulk", response_model=BulkOrderResponse)
+async def place_orders_bulk(
+    batch: BulkOrderCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Offline kiosks replay their queue here; each order carries a client_key
+    # so uploading the same batch again only reports duplicates
+    await menu_catalog.snapshot_async(db)
+    return await db.run_sync(OrderService.create_orders_bulk, current_user, batch.orders, menu_catalog)
+
 @router.get("/history")
 async def get_order_history(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    result = await db.execute(select(Order).where(Order.user_id == current_user.id).order_by(Order.id.desc()))
+    return result.scalars().all()
+
+
+# --- Menu administration (changes are live on the next request in every process, no restart needed) ---
+# Plain def: these use the sync session, so FastAPI runs them in its threadpool
+
+@router.get("/items")
+def list_menu_items(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    orders = db.query(Order).filter(Order.user_id == current_user.id).order_by(Order.id.desc()).all()
-    return orders
+    if current_user.role != "ADMIN":
+        return {"error": "Unauthorized"}
+    return with_live_stock(menu_catalog.snapshot(db).items, MenuCatalog.stock_levels(db))
+
+@router.post("/items")
+def create_menu_item(
+    item: MenuItemCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "ADMIN":
+        return {"error": "Unauthorized"}
+    if item.id is not None and db.query(MenuItem).filter(MenuItem.id == item.id).first():
+        raise HTTPException(status_code=400, detail=f"Food item {item.id} already exists.")
+
+    data = item.dict(exclude_none=True)
+    data["is_available"] = int(item.is_available)
+    db_item = MenuItem(**data)
+    db.add(db_item)
+    MenuCatalog.bump_version(db)
+    db.commit()
+    db.refresh(db_item)
+    return menu_item_to_dict(db_item)
+
+@router.put("/items/{item_id}")
+def update_menu_item(
+    item_id: int,
+    item: MenuItemUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "ADMIN":
+        return {"error": "Unauthorized"}
+    db_item = db.query(MenuItem).filter(MenuItem.id == item_id).first()
+    if not db_item:
+        raise HTTPException(status_code=404, detail=f"Food item {item_id} not found.")
+
+    for field, value in item.dict(exclude_unset=True).items():
+        setattr(db_item, field, int(value) if field == "is_available" else value)
+    MenuCatalog.bump_version(db)
+    db.commit()
+    db.refresh(db_item)
+    return menu_item_to_dict(db_item)
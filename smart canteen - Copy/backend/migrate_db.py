@@ -1,45 +1,24 @@
-import sqlite3
-import os
+"""
+Apply pending schema migrations (see migrations/).
 
-db_path = "canteen.db"
-if os.path.exists(db_path):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    print("Migrating users table...")
-    try:
-        cursor.execute("ALTER TABLE users ADD COLUMN profile_completed INTEGER DEFAULT 0")
-        print("Added profile_completed to users")
-    except Exception as e:
-        print(f"Skipped profile_completed: {e}")
-        
-    try:
-        cursor.execute("ALTER TABLE users ADD COLUMN onboarding_step INTEGER DEFAULT 0")
-        print("Added onboarding_step to users")
-    except Exception as e:
-        print(f"Skipped onboarding_step: {e}")
+Usage:
+    python migrate_db.py             # migrate to the latest version
+    python migrate_db.py --target 2  # migrate up to version 2
+    python migrate_db.py --status    # list migrations and when they were applied
+"""
+import argparse
+from database import engine
+from migrations.runner import run_migrations, status
 
-    print("\nMigrating health_profiles table...")
-    try:
-        cursor.execute("ALTER TABLE health_profiles ADD COLUMN bmi_category TEXT DEFAULT 'Normal'")
-        print("Added bmi_category to health_profiles")
-    except Exception as e:
-        print(f"Skipped bmi_category: {e}")
-        
-    try:
-        cursor.execute("ALTER TABLE health_profiles ADD COLUMN risk_score INTEGER DEFAULT 0")
-        print("Added risk_score to health_profiles")
-    except Exception as e:
-        print(f"Skipped risk_score: {e}")
-        
-    try:
-        cursor.execute("ALTER TABLE health_profiles ADD COLUMN risk_level TEXT DEFAULT 'Low'")
-        print("Added risk_level to health_profiles")
-    except Exception as e:
-        print(f"Skipped risk_level: {e}")
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", type=int, help="highest migration version to apply")
+    parser.add_argument("--status", action="store_true", help="show applied / pending migrations")
+    args = parser.parse_args()
 
-    conn.commit()
-    conn.close()
-    print("\nMigration complete.")
-else:
-    print("Database not found")
+    if args.status:
+        for number, name, applied_at in status(engine):
+            print(f"{number:04d}_{name:<40} {applied_at or 'pending'}")
+    else:
+        run_migrations(engine, target=args.target)
+        print("\nMigration complete.")
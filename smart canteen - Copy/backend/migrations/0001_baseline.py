@@ -0,0 +1,93 @@
+"""
+Baseline: the schema as it stood when versioned migrations were introduced
+(users, menu_items, health_profiles, orders, daily_logs), written out as DDL so
+it never changes with the models. Tables and indexes are only created if
+missing, so databases created by older versions of the app keep their data and
+get the rest from later migrations.
+"""
+from sqlalchemy import text
+
+BASELINE_DDL = (
+    "CREATE TABLE IF NOT EXISTS users ("
+    " id INTEGER NOT NULL,"
+    " name VARCHAR,"
+    " email VARCHAR,"
+    " hashed_password VARCHAR,"
+    " role VARCHAR,"
+    " disabled INTEGER,"
+    " profile_completed INTEGER,"
+    " onboarding_step INTEGER,"
+    " PRIMARY KEY (id))",
+    "CREATE INDEX IF NOT EXISTS ix_users_name ON users (name)",
+    "CREATE INDEX IF NOT EXISTS ix_users_id ON users (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+
+    "CREATE TABLE IF NOT EXISTS menu_items ("
+    " id INTEGER NOT NULL,"
+    " name VARCHAR NOT NULL,"
+    " price FLOAT,"
+    " image VARCHAR,"
+    " description VARCHAR,"
+    " calories FLOAT,"
+    " sugar FLOAT,"
+    " protein FLOAT,"
+    " sodium FLOAT,"
+    " carbs FLOAT,"
+    " stock_quantity INTEGER,"
+    " is_available INTEGER,"
+    " PRIMARY KEY (id))",
+    "CREATE INDEX IF NOT EXISTS ix_menu_items_id ON menu_items (id)",
+
+    "CREATE TABLE IF NOT EXISTS health_profiles ("
+    " id INTEGER NOT NULL,"
+    " user_id INTEGER,"
+    " age INTEGER,"
+    " height_cm FLOAT,"
+    " weight_kg FLOAT,"
+    " bmi FLOAT,"
+    " gender VARCHAR,"
+    " disease VARCHAR,"
+    " severity VARCHAR,"
+    " health_values VARCHAR,"
+    " diabetes_status VARCHAR,"
+    " bp_status VARCHAR,"
+    " cholesterol_status VARCHAR,"
+    " bmi_category VARCHAR,"
+    " risk_score INTEGER,"
+    " risk_level VARCHAR,"
+    " allergies VARCHAR,"
+    " dietary_preference VARCHAR,"
+    " version INTEGER,"
+    " PRIMARY KEY (id),"
+    " FOREIGN KEY(user_id) REFERENCES users (id))",
+    "CREATE INDEX IF NOT EXISTS ix_health_profiles_id ON health_profiles (id)",
+
+    "CREATE TABLE IF NOT EXISTS orders ("
+    " id INTEGER NOT NULL,"
+    " user_id INTEGER,"
+    " items VARCHAR,"
+    " total_price FLOAT,"
+    " total_calories FLOAT,"
+    " total_sugar FLOAT,"
+    " total_sodium FLOAT,"
+    " created_at DATETIME,"
+    " PRIMARY KEY (id),"
+    " FOREIGN KEY(user_id) REFERENCES users (id))",
+    "CREATE INDEX IF NOT EXISTS ix_orders_id ON orders (id)",
+
+    "CREATE TABLE IF NOT EXISTS daily_logs ("
+    " id INTEGER NOT NULL,"
+    " user_id INTEGER,"
+    " date VARCHAR,"
+    " water_intake_ml INTEGER,"
+    " steps INTEGER,"
+    " mood VARCHAR,"
+    " PRIMARY KEY (id),"
+    " FOREIGN KEY(user_id) REFERENCES users (id))",
+    "CREATE INDEX IF NOT EXISTS ix_daily_logs_id ON daily_logs (id)",
+)
+
+
+def upgrade(conn):
+    for statement in BASELINE_DDL:
+        conn.execute(text(statement))
@@ -0,0 +1,28 @@
+"""
+Columns previously added by the ad-hoc migrate_db.py script: onboarding flags
+on users; BMI category, risk and version on health_profiles.
+Also recomputes bmi_category for profiles that only got the column default.
+"""
+from migrations.runner import add_column, backfill
+
+BMI_CATEGORY_SQL = (
+    "CASE WHEN bmi < 18.5 THEN 'Underweight' WHEN bmi < 25 THEN 'Normal' "
+    "WHEN bmi < 30 THEN 'Overweight' ELSE 'Obese' END"
+)
+
+
+def upgrade(conn):
+    add_column(conn, "users", "profile_completed", "INTEGER DEFAULT 0")
+    add_column(conn, "users", "onboarding_step", "INTEGER DEFAULT 0")
+
+    add_column(conn, "health_profiles", "bmi_category", "TEXT DEFAULT 'Normal'")
+    add_column(conn, "health_profiles", "risk_score", "INTEGER DEFAULT 0")
+    add_column(conn, "health_profiles", "risk_level", "TEXT DEFAULT 'Low'")
+    add_column(conn, "health_profiles", "version", "INTEGER DEFAULT 0")
+
+    # Same thresholds as services.risk_engine.get_bmi_category
+    backfill(
+        conn, "health_profiles",
+        f"bmi_category = {BMI_CATEGORY_SQL}",
+        f"bmi IS NOT NULL AND bmi_category IS NOT {BMI_CATEGORY_SQL}"
+    )
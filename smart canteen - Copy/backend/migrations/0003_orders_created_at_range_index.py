@@ -0,0 +1,11 @@
+"""
+orders.created_at: rewrite ISO strings ('T' separator) to the
+'YYYY-MM-DD HH:MM:SS' form stored by the DateTime column so range predicates
+compare correctly, then add the (user_id, created_at) index.
+"""
+from migrations.runner import backfill, create_index
+
+
+def upgrade(conn):
+    backfill(conn, "orders", "created_at = replace(created_at, 'T', ' ')", "created_at LIKE '%T%'")
+    create_index(conn, "ix_orders_user_created", "orders", ["user_id", "created_at"])
@@ -0,0 +1,116 @@
+"""
+order_items: one row per (order, food item) with quantity and per-unit
+nutrients/price, backfilled from the JSON list in orders.items.
+Nutrients and price for old orders come from the menu_items rows, or from the
+built-in menu (copied below as it was when this migration was written) for
+databases that predate menu_items. Like every migration, the table and the
+backfill are written out here rather than taken from the models.
+"""
+import json
+from sqlalchemy import text
+from migrations.runner import backfill_in_batches
+
+ORDER_ITEMS_DDL = (
+    "CREATE TABLE IF NOT EXISTS order_items ("
+    " id INTEGER NOT NULL,"
+    " order_id INTEGER NOT NULL,"
+    " item_id INTEGER NOT NULL,"
+    " qty INTEGER NOT NULL,"
+    " calories FLOAT,"
+    " sugar FLOAT,"
+    " sodium FLOAT,"
+    " price FLOAT,"
+    " PRIMARY KEY (id),"
+    " FOREIGN KEY(order_id) REFERENCES orders (id))",
+    "CREATE INDEX IF NOT EXISTS ix_order_items_item_id ON order_items (item_id)",
+    "CREATE INDEX IF NOT EXISTS ix_order_items_order_id ON order_items (order_id)",
+)
+
+# Built-in menu at the time of this migration: (id, calories, sugar, sodium, price)
+BUILTIN_MENU = (
+    (101, 650, 8, 1200, 250),
+    (102, 150, 2, 150, 180),
+    (103, 850, 12, 1500, 220),
+    (104, 550, 4, 1800, 280),
+    (105, 420, 3, 800, 200),
+    (106, 350, 5, 900, 320),
+    (107, 480, 2, 1100, 190),
+    (108, 520, 45, 300, 150),
+    (109, 400, 0, 400, 350),
+    (110, 320, 2, 200, 230),
+    (111, 450, 1, 800, 120),
+    (112, 800, 10, 1600, 290),
+    (113, 250, 0, 10, 90),
+    (114, 700, 5, 1100, 270),
+    (115, 900, 2, 1400, 240),
+    (116, 450, 6, 1200, 180),
+    (117, 1100, 15, 1800, 320),
+    (118, 600, 4, 950, 140),
+    (119, 580, 48, 420, 160),
+    (120, 180, 42, 30, 80),
+    (121, 850, 8, 1400, 300),
+    (122, 650, 4, 1100, 180),
+    (123, 550, 6, 950, 210),
+    (124, 280, 35, 120, 110),
+    (125, 300, 2, 450, 130),
+    (126, 220, 40, 50, 100),
+    (127, 320, 0, 150, 190),
+    (128, 55, 0, 25, 120),
+    (129, 160, 0, 5, 150),
+    (130, 100, 0, 60, 140),
+)
+
+
+def parse_item_ids(raw):
+    """Food ids from an orders.items value (ids or {"id": ...} dicts, as OrderService accepts)."""
+    try:
+        entries = json.loads(raw) if raw else []
+    except (TypeError, ValueError):
+        return []
+    return [entry.get("id") if isinstance(entry, dict) else entry for entry in entries]
+
+
+def upgrade(conn):
+    for statement in ORDER_ITEMS_DDL:
+        conn.execute(text(statement))
+
+    menu = {
+        item_id: {"calories": calories, "sugar": sugar, "sodium": sodium, "price": price}
+        for item_id, calories, sugar, sodium, price in BUILTIN_MENU
+    }
+    menu.update(
+        (row.id, dict(row._mapping))
+        for row in conn.execute(text("SELECT id, calories, sugar, sodium, price FROM menu_items"))
+    )
+    select_orders = text(
+        "SELECT id, items FROM orders WHERE rowid >= :batch_low AND rowid < :batch_high "
+        "AND NOT EXISTS (SELECT 1 FROM order_items WHERE order_items.order_id = orders.id)"
+    )
+    insert_line = text(
+        "INSERT INTO order_items (order_id, item_id, qty, calories, sugar, sodium, price) "
+        "VALUES (:order_id, :item_id, :qty, :calories, :sugar, :sodium, :price)"
+    )
+
+    def convert_batch(conn, batch_low, batch_high):
+        lines = []
+        orders = conn.execute(select_orders, {"batch_low": batch_low, "batch_high": batch_high}).all()
+        for order_id, raw_items in orders:
+            quantities = {}
+            for item_id in parse_item_ids(raw_items):
+                if item_id is not None:
+                    quantities[item_id] = quantities.get(item_id, 0) + 1
+            for item_id, qty in quantities.items():
+                item = menu.get(item_id, {})
+                lines.append({
+                    "order_id": order_id, "item_id": item_id, "qty": qty,
+                    "calories": item.get("calories"),
+                    "sugar": item.get("sugar"),
+                    "sodium": item.get("sodium"),
+                    "price": item.get("price"),
+                })
+        if lines:
+            conn.execute(insert_line, lines)
+        return len(orders)
+
+    converted = backfill_in_batches(conn, "orders", convert_batch)
+    print(f"  converted {converted} orders into order_items")
@@ -0,0 +1,11 @@
+"""
+orders.client_key: optional key supplied by offline kiosks with each queued
+order. The unique (user_id, client_key) index makes replaying a bulk upload
+safe; rows without a key (NULL) never conflict.
+"""
+from migrations.runner import add_column, create_index
+
+
+def upgrade(conn):
+    add_column(conn, "orders", "client_key", "VARCHAR")
+    create_index(conn, "ix_orders_user_client_key", "orders", ["user_id", "client_key"], unique=True)
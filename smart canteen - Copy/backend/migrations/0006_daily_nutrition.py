@@ -0,0 +1,49 @@
+"""
+daily_nutrition: per-user, per-day order totals maintained by OrderService
+in the order transaction, built here from the existing orders in batches.
+The table and the build query are frozen copies of what the rollup used when
+this migration was written (services/nutrition_rollup.py may change later).
+"""
+from sqlalchemy import text
+from migrations.runner import backfill_in_batches
+
+DAILY_NUTRITION_DDL = (
+    "CREATE TABLE IF NOT EXISTS daily_nutrition ("
+    " user_id INTEGER NOT NULL,"
+    " date VARCHAR NOT NULL,"
+    " calories FLOAT NOT NULL,"
+    " sugar FLOAT NOT NULL,"
+    " sodium FLOAT NOT NULL,"
+    " price FLOAT NOT NULL,"
+    " order_count INTEGER NOT NULL,"
+    " PRIMARY KEY (user_id, date),"
+    " FOREIGN KEY(user_id) REFERENCES users (id))"
+)
+
+BUILD_BATCH = text(
+    "INSERT INTO daily_nutrition (user_id, date, calories, sugar, sodium, price, order_count) "
+    "SELECT user_id, date(created_at), COALESCE(SUM(total_calories), 0), COALESCE(SUM(total_sugar), 0), "
+    "COALESCE(SUM(total_sodium), 0), COALESCE(SUM(total_price), 0), COUNT(*) "
+    "FROM orders WHERE rowid >= :batch_low AND rowid < :batch_high "
+    "AND user_id IS NOT NULL AND created_at IS NOT NULL "
+    "GROUP BY user_id, date(created_at) "
+    "ON CONFLICT (user_id, date) DO UPDATE SET "
+    "calories = calories + excluded.calories, sugar = sugar + excluded.sugar, "
+    "sodium = sodium + excluded.sodium, price = price + excluded.price, "
+    "order_count = order_count + excluded.order_count"
+)
+
+
+def upgrade(conn):
+    conn.execute(text(DAILY_NUTRITION_DDL))
+    # Start from empty so an interrupted build can simply run again
+    conn.execute(text("DELETE FROM daily_nutrition"))
+    high = conn.execute(text("SELECT MAX(rowid) FROM orders")).scalar()
+    conn.commit()
+
+    def build_batch(conn, batch_low, batch_high):
+        return conn.execute(BUILD_BATCH, {"batch_low": batch_low, "batch_high": batch_high}).rowcount
+
+    backfill_in_batches(conn, "orders", build_batch, high=high)
+    rows = conn.execute(text("SELECT COUNT(*) FROM daily_nutrition")).scalar()
+    print(f"  built {rows} daily_nutrition rows")
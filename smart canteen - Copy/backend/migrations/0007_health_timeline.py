@@ -0,0 +1,24 @@
+"""
+health_timeline: stored daily health scores, appended incrementally by
+services/health_timeline.py (nothing to backfill; points are computed on the
+first timeline request). Also index daily_logs by (user_id, date) for the
+per-user range reads the timeline makes.
+"""
+from sqlalchemy import text
+from migrations.runner import create_index
+
+HEALTH_TIMELINE_DDL = (
+    "CREATE TABLE IF NOT EXISTS health_timeline ("
+    " user_id INTEGER NOT NULL,"
+    " date VARCHAR NOT NULL,"
+    " score INTEGER,"
+    " event VARCHAR,"
+    " profile_updated INTEGER NOT NULL,"
+    " PRIMARY KEY (user_id, date),"
+    " FOREIGN KEY(user_id) REFERENCES users (id))"
+)
+
+
+def upgrade(conn):
+    conn.execute(text(HEALTH_TIMELINE_DDL))
+    create_index(conn, "ix_daily_logs_user_date", "daily_logs", ["user_id", "date"])
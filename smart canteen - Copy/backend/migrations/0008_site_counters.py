@@ -0,0 +1,54 @@
+"""
+site_counters: site-wide orders, revenue and risk alerts per day and hour,
+maintained by OrderService in the order transaction; built here from the
+existing orders. The table, the build query and the daily limits are frozen
+copies of services/site_counters.py and services/nutrition_aggregator.py as
+they were when this migration was written.
+"""
+from sqlalchemy import text
+
+SITE_COUNTERS_DDL = (
+    "CREATE TABLE IF NOT EXISTS site_counters ("
+    " bucket VARCHAR NOT NULL,"
+    " orders INTEGER NOT NULL,"
+    " revenue FLOAT NOT NULL,"
+    " risk_alerts INTEGER NOT NULL,"
+    " PRIMARY KEY (bucket))"
+)
+
+CALORIE_LIMIT = 2500
+SUGAR_LIMIT = 50
+SODIUM_LIMIT = 2300
+
+# Day and hour buckets from every order. An order is a risk alert when it takes
+# its user's day over a daily limit (running totals in placement order).
+BUILD = text(
+    "WITH running AS ("
+    "  SELECT created_at, COALESCE(total_price, 0) AS price, "
+    "  COALESCE(total_calories, 0) AS calories, SUM(COALESCE(total_calories, 0)) OVER day_so_far AS day_calories, "
+    "  COALESCE(total_sugar, 0) AS sugar, SUM(COALESCE(total_sugar, 0)) OVER day_so_far AS day_sugar, "
+    "  COALESCE(total_sodium, 0) AS sodium, SUM(COALESCE(total_sodium, 0)) OVER day_so_far AS day_sodium "
+    "  FROM orders WHERE user_id IS NOT NULL AND created_at IS NOT NULL "
+    "  WINDOW day_so_far AS (PARTITION BY user_id, date(created_at) ORDER BY created_at, id ROWS UNBOUNDED PRECEDING)"
+    "), flagged AS ("
+    "  SELECT created_at, price, "
+    "  (day_calories > :calorie_limit AND day_calories - calories <= :calorie_limit) "
+    "  OR (day_sugar > :sugar_limit AND day_sugar - sugar <= :sugar_limit) "
+    "  OR (day_sodium > :sodium_limit AND day_sodium - sodium <= :sodium_limit) AS alert "
+    "  FROM running"
+    ") "
+    "INSERT INTO site_counters (bucket, orders, revenue, risk_alerts) "
+    "SELECT date(created_at), COUNT(*), SUM(price), SUM(alert) FROM flagged GROUP BY date(created_at) "
+    "UNION ALL "
+    "SELECT strftime('%Y-%m-%d %H', created_at), COUNT(*), SUM(price), SUM(alert) FROM flagged "
+    "GROUP BY strftime('%Y-%m-%d %H', created_at)"
+)
+
+
+def upgrade(conn):
+    conn.execute(text(SITE_COUNTERS_DDL))
+    # Start from empty so an interrupted build can simply run again
+    conn.execute(text("DELETE FROM site_counters"))
+    conn.execute(BUILD, {"calorie_limit": CALORIE_LIMIT, "sugar_limit": SUGAR_LIMIT, "sodium_limit": SODIUM_LIMIT})
+    buckets = conn.execute(text("SELECT COUNT(*) FROM site_counters")).scalar()
+    print(f"  built {buckets} site_counters buckets")
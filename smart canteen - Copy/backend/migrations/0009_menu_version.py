@@ -0,0 +1,16 @@
+"""
+menu_version: shared counter that tells every server process when to reload
+its menu catalog snapshot. The row is created by the first menu change.
+"""
+from sqlalchemy import text
+
+MENU_VERSION_DDL = (
+    "CREATE TABLE IF NOT EXISTS menu_version ("
+    " id INTEGER NOT NULL,"
+    " version INTEGER NOT NULL,"
+    " PRIMARY KEY (id))"
+)
+
+
+def upgrade(conn):
+    conn.execute(text(MENU_VERSION_DDL))
@@ -0,0 +1,152 @@
+"""
+Versioned schema migrations.
+
+Migrations live next to this file as NNNN_description.py modules that define
+upgrade(conn), where conn is a SQLAlchemy Connection. The runner applies the
+ones newer than the version recorded in the schema_version table, in order,
+committing and recording each one as it completes.
+
+Migrations must be idempotent (use add_column / create_index / backfill below)
+so a migration interrupted half way, or run by two workers at once, is safe
+to run again.
+"""
+import importlib.util
+import os
+import re
+import time
+from datetime import datetime
+from sqlalchemy import text
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+# Backfills touch at most this many rows per transaction and pause between
+# batches so request traffic can take the write lock in between
+BACKFILL_BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", 2000))
+BACKFILL_PAUSE_SEC = float(os.environ.get("MIGRATION_BATCH_PAUSE_SEC", 0.05))
+
+
+def discover():
+    """[(version, name, module)] for every migration file, sorted by version."""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        spec = importlib.util.spec_from_file_location(f"migrations.m{match.group(1)}", os.path.join(MIGRATIONS_DIR, filename))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        migrations.append((int(match.group(1)), match.group(2), module))
+    return migrations
+
+
+def ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TEXT NOT NULL)"
+    ))
+    conn.commit()
+
+
+def current_version(conn):
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def run_migrations(engine, target=None):
+    """Apply pending migrations up to `target` (default: latest). Returns the versions applied."""
+    applied = []
+    with engine.connect() as conn:
+        ensure_version_table(conn)
+        version = current_version(conn)
+        conn.commit()
+
+        for number, name, module in discover():
+            if number <= version or (target is not None and number > target):
+                continue
+            print(f"Applying migration {number:04d}_{name}...")
+            start = time.perf_counter()
+            module.upgrade(conn)
+            conn.execute(
+                text("INSERT OR IGNORE INTO schema_version (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": number, "n": name, "t": datetime.now().isoformat(sep=" ")}
+            )
+            conn.commit()
+            print(f"Migration {number:04d}_{name} applied in {time.perf_counter() - start:.2f}s")
+            applied.append(number)
+
+    if not applied:
+        print(f"Database schema is up to date (version {version})")
+    return applied
+
+
+def status(engine):
+    """[(version, name, applied_at or None)] for every known migration."""
+    with engine.connect() as conn:
+        ensure_version_table(conn)
+        applied = dict(conn.execute(text("SELECT version, applied_at FROM schema_version")).all())
+    return [(number, name, applied.get(number)) for number, name, _ in discover()]
+
+
+# --- Helpers for migration modules ---
+
+def column_names(conn, table):
+    return {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+
+
+def add_column(conn, table, column, ddl):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists."""
+    if column in column_names(conn, table):
+        return False
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    print(f"  added {table}.{column}")
+    return True
+
+
+def create_index(conn, name, table, columns, unique=False):
+    conn.execute(text(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
+
+
+def backfill(conn, table, assignments, where, params=None, batch_size=None, pause=None):
+    """
+    UPDATE `table` SET `assignments` WHERE `where`, in rowid ranges of batch_size
+    rows, committing after each range. `where` must exclude rows that are already
+    done so an interrupted backfill can be resumed. Returns the number of rows updated.
+    """
+    statement = text(
+        f"UPDATE {table} SET {assignments} "
+        f"WHERE rowid >= :batch_low AND rowid < :batch_high AND ({where})"
+    )
+
+    def update_batch(conn, batch_low, batch_high):
+        return conn.execute(statement, {**(params or {}), "batch_low": batch_low, "batch_high": batch_high}).rowcount
+
+    updated = backfill_in_batches(conn, table, update_batch, batch_size, pause)
+    print(f"  backfilled {updated} rows in {table}")
+    return updated
+
+
+def backfill_in_batches(conn, table, process_batch, batch_size=None, pause=None, high=None):
+    """
+    Call process_batch(conn, batch_low, batch_high) for consecutive rowid ranges
+    [batch_low, batch_high) of `table`, committing after each one. process_batch
+    returns how many rows it changed and must skip rows that are already done.
+    `high` caps the last rowid visited (default: the current MAX(rowid)).
+    """
+    batch_size = batch_size or BACKFILL_BATCH_SIZE
+    pause = BACKFILL_PAUSE_SEC if pause is None else pause
+    conn.commit()  # never hold earlier DDL in the same transaction as the batches
+
+    low, max_rowid = conn.execute(text(f"SELECT MIN(rowid), MAX(rowid) FROM {table}")).one()
+    conn.commit()
+    high = max_rowid if high is None else high
+    if low is None or high is None:
+        return 0
+
+    changed = 0
+    for batch_low in range(low, high + 1, batch_size):
+        count = process_batch(conn, batch_low, min(batch_low + batch_size, high + 1))
+        conn.commit()
+        changed += count
+        if pause and count:
+            time.sleep(pause)
+    return changed
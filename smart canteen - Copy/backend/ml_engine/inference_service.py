@@ -1,5 +1,20 @@
+import numpy as np
 from .model_loader import ModelLoader
 
+# Neutral probability returned when inference fails
+FALLBACK_PROBABILITY = 0.5
+
+
+def extract_features(user_profile, food_item):
+    """Feature row for one (user, food item) pair: [age, bmi, food_calories, food_sugar]"""
+    return [
+        user_profile.get("age") or 30,
+        user_profile.get("bmi") or 22.0,
+        food_item.get("calories", 0),
+        food_item.get("sugar", 0)
+    ]
+
+
 def get_ml_probability(user_profile, food_item):
     """
     Interface connecting recommendation_service to the ML model.
@@ -8,14 +23,7 @@ def get_ml_probability(user_profile, food_item):
     loader = ModelLoader()
     model = loader.get_model()
 
-    # In a real scenario, extract array of features
-    # features = extract_features(user_profile, food_item)
-    features = [[
-        user_profile.get("age", 30),
-        user_profile.get("bmi", 22.0),
-        food_item.get("calories", 0),
-        food_item.get("sugar", 0)
-    ]]
+    features = [extract_features(user_profile, food_item)]
 
     try:
         # Assuming model has predict_proba
@@ -25,4 +33,24 @@ def get_ml_probability(user_profile, food_item):
     except Exception as e:
         print(f"ML Inference Error: {e}")
         # Return neutral probability if inference fails
-        return 0.5
+        return FALLBACK_PROBABILITY
+
+
+def get_ml_probabilities(user_profile, food_items):
+    """
+    Batch interface: builds the feature matrix for one user and a whole menu and
+    gets every MLProbability from a single predict_proba call.
+    Returns a float array aligned with food_items.
+    """
+    if not food_items:
+        return np.zeros(0)
+
+    model = ModelLoader().get_model()
+    features = np.array([extract_features(user_profile, item) for item in food_items], dtype=float)
+
+    try:
+        probabilities = np.asarray(model.predict_proba(features), dtype=float)
+        return probabilities[:, 1]
+    except Exception as e:
+        print(f"ML Batch Inference Error: {e}")
+        return np.full(len(food_items), FALLBACK_PROBABILITY)
@@ -29,9 +29,9 @@ class ModelLoader:
         class MockModel:
             def predict_proba(self, features):
                 # features: [age, bmi, disease_count, food_calories, food_sugar, ...]
-                # Return a random probability for demonstration of architecture
-                prob = random.uniform(0.4, 0.95)
-                return [[1 - prob, prob]]
+                # Return a random probability per row for demonstration of architecture
+                probs = [random.uniform(0.4, 0.95) for _ in features]
+                return [[1 - prob, prob] for prob in probs]
         return MockModel()
 
     def get_model(self):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -51,6 +51,9 @@ class HealthProfile(Base):
     allergies = Column(String, default="None")  # JSON list of structured allergies
     dietary_preference = Column(String, default="Veg")
 
+    # Incremented on every profile write (used for ETags and cache keys)
+    version = Column(Integer, default=0)
+
     user = relationship("User", back_populates="health_profile")
 
 
@@ -64,10 +67,45 @@ class Order(Base):
     total_calories = Column(Float)
     total_sugar = Column(Float)
     total_sodium = Column(Float)
-    created_at = Column(String, default=lambda: datetime.now().isoformat())
+    created_at = Column(DateTime, default=datetime.now)
+    client_key = Column(String, nullable=True)  # kiosk-supplied key, makes bulk replays idempotent
 
     user = relationship("User", back_populates="orders")
 
+    # Per-user time-range queries (analytics) are served from this index
+    __table_args__ = (
+        Index("ix_orders_user_created", "user_id", "created_at"),
+        Index("ix_orders_user_client_key", "user_id", "client_key", unique=True),
+    )
+
+
+class OrderItem(Base):
+    """One line of an order, normalized out of Order.items for SQL-side aggregation."""
+    __tablename__ = "order_items"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    item_id = Column(Integer, nullable=False, index=True)
+    qty = Column(Integer, nullable=False, default=1)
+    # Per-unit values from the menu at the time of the order
+    calories = Column(Float)
+    sugar = Column(Float)
+    sodium = Column(Float)
+    price = Column(Float)
+
+
+class DailyNutrition(Base):
+    """Per-user, per-day order totals, kept up to date in the order transaction (services/nutrition_rollup.py)."""
+    __tablename__ = "daily_nutrition"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    date = Column(String, primary_key=True)  # 'YYYY-MM-DD'
+    calories = Column(Float, nullable=False, default=0)
+    sugar = Column(Float, nullable=False, default=0)
+    sodium = Column(Float, nullable=False, default=0)
+    price = Column(Float, nullable=False, default=0)
+    order_count = Column(Integer, nullable=False, default=0)
+
 
 class DailyLog(Base):
     __tablename__ = "daily_logs"
@@ -82,3 +120,55 @@ class DailyLog(Base):
 
     user = relationship("User", back_populates="daily_logs")
 
+    # Timeline and history reads are per-user date ranges
+    __table_args__ = (Index("ix_daily_logs_user_date", "user_id", "date"),)
+
+
+class SiteCounter(Base):
+    """Site-wide order counters per day ('YYYY-MM-DD') and hour ('YYYY-MM-DD HH'), kept up to date in the order transaction (services/site_counters.py)."""
+    __tablename__ = "site_counters"
+
+    bucket = Column(String, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    risk_alerts = Column(Integer, nullable=False, default=0)
+
+
+class MenuVersion(Base):
+    """Single-row counter bumped in every transaction that changes menu content or availability (services/menu_catalog.py)."""
+    __tablename__ = "menu_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class HealthTimelinePoint(Base):
+    """Stored daily health score per user (services/health_timeline.py); only completed days are scored."""
+    __tablename__ = "health_timeline"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    date = Column(String, primary_key=True)  # 'YYYY-MM-DD'
+    score = Column(Integer, nullable=True)  # NULL until the day is computed (or after invalidation)
+    event = Column(String, nullable=True)
+    profile_updated = Column(Integer, nullable=False, default=0)
+
+
+class MenuItem(Base):
+    __tablename__ = "menu_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    price = Column(Float, default=0)
+    image = Column(String, default="")
+    description = Column(String, default="")
+
+    # Nutrition per serving (used for AI analysis)
+    calories = Column(Float, default=0)
+    sugar = Column(Float, default=0)
+    protein = Column(Float, default=0)
+    sodium = Column(Float, default=0)
+    carbs = Column(Float, default=0)
+
+    # Phase 6: stock & availability
+    stock_quantity = Column(Integer, default=10)
+    is_available = Column(Integer, default=1)  # 0 = hidden from menu, 1 = on sale
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, validator
 import re
 from typing import Optional, List
+from datetime import datetime
 from enum import Enum
 
 
@@ -177,12 +178,73 @@ class OrderCreate(BaseModel):
 class OrderResponse(OrderCreate):
     id: int
     user_id: int
-    created_at: str
+    created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+# Bulk ingestion of orders queued by offline kiosks
+class BulkOrderEntry(OrderCreate):
+    client_key: str = Field(..., min_length=1, max_length=64)
+    placed_at: Optional[datetime] = None
+
+
+class BulkOrderCreate(BaseModel):
+    orders: List[BulkOrderEntry] = Field(..., min_length=1, max_length=500)
+
+
+class BulkOrderResult(BaseModel):
+    client_key: str
+    status: str  # created | duplicate | rejected
+    order_id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BulkOrderResponse(BaseModel):
+    created: int
+    duplicates: int
+    rejected: int
+    results: List[BulkOrderResult]
+
+
+# Menu item schemas
+class MenuItemCreate(BaseModel):
+    id: Optional[int] = None
+    name: str = Field(..., min_length=1)
+    price: float = Field(..., ge=0)
+    image: str = ""
+    description: str = ""
+    calories: float = Field(default=0, ge=0)
+    sugar: float = Field(default=0, ge=0)
+    protein: float = Field(default=0, ge=0)
+    sodium: float = Field(default=0, ge=0)
+    carbs: float = Field(default=0, ge=0)
+    stock_quantity: int = Field(default=10, ge=0)
+    is_available: bool = True
+
+
+class MenuItemUpdate(BaseModel):
+    name: Optional[str] = Field(default=None, min_length=1)
+    price: Optional[float] = Field(default=None, ge=0)
+    image: Optional[str] = None
+    description: Optional[str] = None
+    calories: Optional[float] = Field(default=None, ge=0)
+    sugar: Optional[float] = Field(default=None, ge=0)
+    protein: Optional[float] = Field(default=None, ge=0)
+    sodium: Optional[float] = Field(default=None, ge=0)
+    carbs: Optional[float] = Field(default=None, ge=0)
+    stock_quantity: Optional[int] = Field(default=None, ge=0)
+    is_available: Optional[bool] = None
+
+    @validator('*', pre=True)
+    def reject_null(cls, v):
+        # Fields are optional to allow partial updates; an explicit null would be written to the row
+        if v is None:
+            raise ValueError("cannot be null; omit the field to leave it unchanged")
+        return v
+
+
 # Daily Log schemas
 class DailyLogCreate(BaseModel):
     water_intake_ml: Optional[int] = 0
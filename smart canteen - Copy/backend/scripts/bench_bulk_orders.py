@@ -0,0 +1,97 @@
+"""
+Benchmark: replaying a kiosk's offline queue one order at a time vs in bulk.
+
+Against a scratch database, ingests --orders queued orders through
+OrderService.create_order (one transaction per order, as the kiosks did via
+/api/menu/order) and through OrderService.create_orders_bulk in batches of
+--batch (one transaction and one executemany per batch, /api/menu/order/bulk).
+The bulk path is then replayed once more to show that replays only report duplicates.
+
+Usage:
+    python scripts/bench_bulk_orders.py [--orders 5000] [--batch 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Ensure imports work when running from this script location
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from sqlalchemy.orm import sessionmaker
+from database import Base, create_sqlite_engine
+from models import User, MenuItem
+from schemas import BulkOrderEntry
+from services.menu_catalog import MenuCatalog
+from services.order_service import OrderService
+from menu import FOOD_ITEMS
+
+
+def setup(orders):
+    db_path = os.path.join(tempfile.mkdtemp(), "bulk_bench.db")
+    engine = create_sqlite_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Session()
+    stock = orders * 4
+    db.add_all(MenuItem(**dict(item, stock_quantity=stock)) for item in FOOD_ITEMS)
+    user = User(name="Kiosk", email="kiosk@example.com", hashed_password="x", role="USER")
+    db.add(user)
+    db.commit()
+
+    class _User:
+        id = user.id
+    db.close()
+    return Session, MenuCatalog(), _User
+
+
+def queued_orders(count, prefix):
+    item_ids = [item["id"] for item in FOOD_ITEMS]
+    return [
+        BulkOrderEntry(
+            client_key=f"{prefix}-{n}",
+            items=[item_ids[n % len(item_ids)], item_ids[(n + 1) % len(item_ids)]],
+            total_price=100, total_calories=500, total_sugar=10, total_sodium=400
+        )
+        for n in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"orders={args.orders} batch={args.batch}")
+
+    Session, catalog, user = setup(args.orders)
+    db = Session()
+    start = time.perf_counter()
+    for entry in queued_orders(args.orders, "single"):
+        OrderService.create_order(db, user, entry, catalog)
+    elapsed = time.perf_counter() - start
+    print(f"{'one per request':<16} {args.orders / elapsed:9.1f} orders/s  ({elapsed:.2f} s)")
+    db.close()
+
+    Session, catalog, user = setup(args.orders)
+    db = Session()
+    entries = queued_orders(args.orders, "bulk")
+    for label in ("bulk", "bulk replay"):
+        start = time.perf_counter()
+        created = duplicates = 0
+        for first in range(0, len(entries), args.batch):
+            result = OrderService.create_orders_bulk(db, user, entries[first:first + args.batch], catalog)
+            created += result["created"]
+            duplicates += result["duplicates"]
+        elapsed = time.perf_counter() - start
+        print(f"{label:<16} {args.orders / elapsed:9.1f} orders/s  ({elapsed:.2f} s)  created={created} duplicates={duplicates}")
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: a login burst verified in FastAPI's threadpool vs the process pool.
+
+The baseline is what the original sync `def` auth routes did: FastAPI ran
+them, password verification included, on its shared threadpool (anyio's
+default limit of 40 threads). Simulates --logins concurrent logins on one
+event loop while two probes stand in for other traffic, every --tick ms:
+- an async route: how late the event loop wakes a sleeping task;
+- a sync route: how long a trivial function waits for a threadpool thread.
+
+Usage:
+    python scripts/bench_login_burst.py [--logins 200] [--workers N] [--tick 10]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Ensure imports work when running from this script location
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+import anyio
+import numpy as np
+from services.password_hasher import PasswordHasher, pwd_context
+
+PASSWORD = "Passw0rd!x"
+
+
+async def burst(verify, logins, tick):
+    loop_lag, thread_wait = [], []
+    done = asyncio.Event()
+
+    async def loop_probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(tick)
+            loop_lag.append(time.perf_counter() - start - tick)
+
+    async def sync_route_probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await anyio.to_thread.run_sync(lambda: None)
+            thread_wait.append(time.perf_counter() - start)
+            await asyncio.sleep(tick)
+
+    hashed = pwd_context.hash(PASSWORD)
+    probes = [asyncio.create_task(loop_probe()), asyncio.create_task(sync_route_probe())]
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(verify(PASSWORD, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await asyncio.gather(*probes)
+
+    assert all(results)
+    p95 = lambda samples: np.percentile(np.array(samples or [0.0]) * 1000, 95)
+    return elapsed, p95(loop_lag), p95(thread_wait)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--tick", type=float, default=10, help="probe sleep in ms")
+    args = parser.parse_args()
+    tick = args.tick / 1000
+
+    async def threadpool_verify(password, hashed):
+        # Original sync route: the whole handler, verify included, ran in a threadpool thread
+        return await anyio.to_thread.run_sync(pwd_context.verify, password, hashed)
+
+    hasher = PasswordHasher(workers=args.workers, queue_timeout=60)
+    # Warm the pool so process start-up is not counted
+    asyncio.run(hasher.verify(PASSWORD, pwd_context.hash(PASSWORD)))
+
+    print(f"logins={args.logins} workers={args.workers} probe tick={args.tick:.0f} ms")
+    for name, verify in (("threadpool", threadpool_verify), ("process pool", hasher.verify)):
+        elapsed, loop_p95, thread_p95 = asyncio.run(burst(verify, args.logins, tick))
+        print(f"{name:<13} burst {elapsed:6.2f} s ({args.logins / elapsed:7.1f} logins/s)  "
+              f"p95 event loop lag {loop_p95:7.1f} ms, p95 sync route wait {thread_p95:7.1f} ms")
+    hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
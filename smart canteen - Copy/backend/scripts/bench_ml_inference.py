@@ -0,0 +1,71 @@
+"""
+Benchmark: per-item vs batched ML inference for one menu view.
+
+Usage:
+    python scripts/bench_ml_inference.py [--repeat 50] [--rf]
+
+--rf trains a throwaway RandomForest (requires scikit-learn) so the numbers
+reflect the fixed per-call overhead of a real forest instead of the mock model.
+"""
+import argparse
+import os
+import sys
+import time
+
+# Ensure imports work when running from this script location
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+import numpy as np
+from ml_engine.model_loader import ModelLoader
+from ml_engine.inference_service import get_ml_probability, get_ml_probabilities
+from menu import FOOD_ITEMS
+
+PROFILE = {"age": 42, "bmi": 27.5, "disease": ["Diabetes"], "allergies": [], "dietary_preference": "Non-Veg"}
+
+
+def train_random_forest():
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(0)
+    features = np.column_stack([
+        rng.integers(18, 80, 5000),
+        rng.uniform(16, 40, 5000),
+        rng.uniform(50, 1200, 5000),
+        rng.uniform(0, 50, 5000),
+    ])
+    labels = (features[:, 3] < 15).astype(int)
+    model = RandomForestClassifier(n_estimators=100, random_state=0)
+    model.fit(features, labels)
+    return model
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50, help="menu views per measurement")
+    parser.add_argument("--rf", action="store_true", help="benchmark a trained RandomForest")
+    args = parser.parse_args()
+
+    loader = ModelLoader()
+    if args.rf:
+        loader._model = train_random_forest()
+
+    per_item = timed(lambda: [get_ml_probability(PROFILE, item) for item in FOOD_ITEMS], args.repeat)
+    batched = timed(lambda: get_ml_probabilities(PROFILE, FOOD_ITEMS), args.repeat)
+
+    print(f"Model: {type(loader.get_model()).__name__}, menu size: {len(FOOD_ITEMS)}, repeat: {args.repeat}")
+    print(f"Per-item predict_proba: {per_item * 1000:8.2f} ms / menu view")
+    print(f"Batched predict_proba:  {batched * 1000:8.2f} ms / menu view")
+    print(f"Speedup:                {per_item / batched:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
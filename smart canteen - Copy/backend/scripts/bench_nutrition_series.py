@@ -0,0 +1,125 @@
+"""
+Benchmark: /api/analytics/nutrition series for 7, 30 and 365 days.
+
+Builds a scratch database with one heavy user (--years of history,
+--per-day orders a day) among --users other users, fills the daily_nutrition
+rollup with NutritionRollup.rebuild, and times three ways to get the series:
+
+    per-day    one SUM query on orders per calendar day (loop in Python)
+    grouped    one GROUP BY date(created_at) query on orders
+    rollup     NutritionAggregator.get_nutrition_series (rollup range read + numpy zero fill)
+
+The rollup series should cost about the same for a year as for a week.
+
+Usage:
+    python scripts/bench_nutrition_series.py [--years 4] [--per-day 20] [--users 2000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Ensure imports work when running from this script location
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+from database import Base, create_sqlite_engine
+from models import Order
+from services.nutrition_aggregator import NutritionAggregator
+from services.nutrition_rollup import NutritionRollup
+
+HEAVY_USER = 1
+REPEAT = 50
+
+
+def fill(db_path, years, per_day, users):
+    rng = random.Random(0)
+    now = datetime.now()
+    rows = []
+    order_id = 0
+    for day in range(years * 365):
+        for _ in range(per_day):
+            order_id += 1
+            created = now - timedelta(days=day, seconds=rng.randrange(86400))
+            rows.append((order_id, HEAVY_USER, created))
+    for _ in range(len(rows)):
+        order_id += 1
+        rows.append((order_id, rng.randrange(2, users + 2), now - timedelta(seconds=rng.randrange(years * 365 * 86400))))
+    rng.shuffle(rows)  # interleave users like real traffic
+
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO orders (id, user_id, items, total_price, total_calories, total_sugar, total_sodium, created_at) "
+        "VALUES (?, ?, '[101]', ?, ?, ?, ?, ?)",
+        ((i, user, rng.uniform(50, 400), rng.uniform(200, 900), rng.uniform(0, 40), rng.uniform(100, 1500),
+          created.strftime("%Y-%m-%d %H:%M:%S.%f")) for i, (_, user, created) in enumerate(rows, 1))
+    )
+    conn.commit()
+    conn.close()
+    return len(rows)
+
+
+def per_day_series(db, user_id, days):
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    series = []
+    for offset in range(days - 1, -1, -1):
+        day_start = today - timedelta(days=offset)
+        series.append(db.query(func.sum(Order.total_calories), func.sum(Order.total_sugar), func.sum(Order.total_sodium)).filter(
+            Order.user_id == user_id,
+            Order.created_at >= day_start,
+            Order.created_at < day_start + timedelta(days=1)
+        ).one())
+    return series
+
+
+def grouped_series(db, user_id, days):
+    since = datetime.combine(datetime.now().date() - timedelta(days=days - 1), datetime.min.time())
+    day = func.date(Order.created_at)
+    return db.query(day, func.sum(Order.total_calories), func.sum(Order.total_sugar), func.sum(Order.total_sodium)).filter(
+        Order.user_id == user_id,
+        Order.created_at >= since
+    ).group_by(day).all()
+
+
+def timed(fn, *args):
+    fn(*args)  # warm the page cache
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn(*args)
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=4)
+    parser.add_argument("--per-day", type=int, default=20, help="orders a day for the heavy user")
+    parser.add_argument("--users", type=int, default=2000, help="other users sharing the orders table")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "series_bench.db")
+    engine = create_sqlite_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    orders = fill(db_path, args.years, args.per_day, args.users)
+    with engine.connect() as conn:
+        NutritionRollup.rebuild(conn, pause=0)
+    db = sessionmaker(bind=engine)()
+
+    print(f"orders={orders:,} (heavy user: {args.years} years x {args.per_day}/day)")
+    print(f"{'days':>5} {'per-day ms':>11} {'grouped ms':>11} {'rollup ms':>10}")
+    for days in (7, 30, 365):
+        assert len(NutritionAggregator.get_nutrition_series(db, HEAVY_USER, days)) == days
+        print(f"{days:>5} {timed(per_day_series, db, HEAVY_USER, days):>11.3f} "
+              f"{timed(grouped_series, db, HEAVY_USER, days):>11.3f} "
+              f"{timed(NutritionAggregator.get_nutrition_series, db, HEAVY_USER, days):>10.3f}")
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: per-user daily nutrition query as the orders table grows.
+
+Builds a synthetic orders table in steps (default up to 10M rows, spread over
+--users users and a year of timestamps) and, at each size, times:
+
+    legacy   created_at as an ISO string, LIKE 'YYYY-MM-DD%' filter, no composite index
+    indexed  SUM over a range predicate on the DateTime column, served by
+             ix_orders_user_created (the query NutritionAggregator ran before
+             the daily_nutrition rollup)
+
+The indexed query should stay flat while the legacy one grows with the table.
+
+Usage:
+    python scripts/bench_order_time_range.py [--sizes 10000,100000,1000000,10000000] [--users 100000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Ensure imports work when running from this script location
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+from database import Base, create_sqlite_engine
+from models import Order
+
+START = datetime(2025, 1, 1)
+QUERIES = 200
+BATCH = 100000
+
+
+def synthetic_orders(rng, first_id, count, users, legacy):
+    for order_id in range(first_id, first_id + count):
+        created = START + timedelta(seconds=rng.randrange(365 * 86400))
+        created_at = created.isoformat() if legacy else created.strftime("%Y-%m-%d %H:%M:%S.%f")
+        yield (order_id, rng.randrange(1, users + 1), "[101]", 250.0, rng.uniform(200, 900), rng.uniform(0, 40), rng.uniform(100, 1500), created_at)
+
+
+def fill(conn, table, rng, first_id, count, users, legacy):
+    insert = f"INSERT INTO {table} (id, user_id, items, total_price, total_calories, total_sugar, total_sodium, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+    for start in range(0, count, BATCH):
+        conn.executemany(insert, synthetic_orders(rng, first_id + start, min(BATCH, count - start), users, legacy))
+    conn.commit()
+
+
+def timed(fn, probes):
+    start = time.perf_counter()
+    for user_id, day in probes:
+        fn(user_id, day)
+    return (time.perf_counter() - start) / len(probes) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000,10000000")
+    parser.add_argument("--users", type=int, default=100000)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    db_path = os.path.join(tempfile.mkdtemp(), "orders_bench.db")
+    engine = create_sqlite_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    # Old schema: string timestamps, only the primary key index
+    conn.execute(
+        "CREATE TABLE legacy_orders (id INTEGER PRIMARY KEY, user_id INTEGER, items VARCHAR, total_price FLOAT, "
+        "total_calories FLOAT, total_sugar FLOAT, total_sodium FLOAT, created_at VARCHAR)"
+    )
+
+    def legacy_query(user_id, day):
+        return conn.execute(
+            "SELECT total_calories, total_sugar FROM legacy_orders WHERE user_id = ? AND created_at LIKE ?",
+            (user_id, day + "%")
+        ).fetchall()
+
+    def indexed_query(user_id, day):
+        day_start = datetime.strptime(day, "%Y-%m-%d")
+        return session.query(func.sum(Order.total_calories), func.sum(Order.total_sugar)).filter(
+            Order.user_id == user_id,
+            Order.created_at >= day_start,
+            Order.created_at < day_start + timedelta(days=1)
+        ).one()
+
+    rng = random.Random(0)
+    rows = 0
+    print(f"users={args.users}, {QUERIES} random (user, day) queries per size")
+    print(f"{'rows':>12} {'legacy ms/query':>16} {'indexed ms/query':>17}")
+    for size in sizes:
+        added = size - rows
+        fill(conn, "orders", random.Random(size), rows + 1, added, args.users, legacy=False)
+        fill(conn, "legacy_orders", random.Random(size), rows + 1, added, args.users, legacy=True)
+        rows = size
+
+        probes = [
+            (rng.randrange(1, args.users + 1), (START + timedelta(days=rng.randrange(365))).strftime("%Y-%m-%d"))
+            for _ in range(QUERIES)
+        ]
+        # Fewer probes for the full-scan query so large sizes finish in reasonable time
+        legacy_ms = timed(legacy_query, probes[:max(5, QUERIES * 10000 // size)])
+        indexed_ms = timed(indexed_query, probes)
+        print(f"{size:>12,} {legacy_ms:>16.3f} {indexed_ms:>17.3f}")
+
+    session.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
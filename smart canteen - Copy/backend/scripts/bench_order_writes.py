@@ -0,0 +1,96 @@
+"""
+Benchmark: write-heavy order load on the default vs tuned SQLite engine.
+
+Several threads place orders concurrently through OrderService.create_order
+(stock reservation + order insert, one commit per order) against a scratch
+database, once with SQLAlchemy's default SQLite settings and once with the
+engine profile from database.py (WAL, synchronous=NORMAL, busy_timeout, ...).
+
+Usage:
+    python scripts/bench_order_writes.py [--threads 8] [--orders 250]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Ensure imports work when running from this script location
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from database import Base, create_sqlite_engine
+from models import User
+from schemas import OrderCreate
+from services.menu_catalog import MenuCatalog
+from services.order_service import OrderService
+from menu import FOOD_ITEMS
+
+
+def run(tuned, threads, orders_per_thread):
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_sqlite_engine(f"sqlite:///{db_path}", tuned=tuned)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    stock = threads * orders_per_thread * 2
+    catalog = MenuCatalog(seed_items=[dict(item, stock_quantity=stock) for item in FOOD_ITEMS])
+    db = Session()
+    user = User(name="Bench", email="bench@example.com", hashed_password="x", role="USER")
+    db.add(user)
+    db.commit()
+    catalog.snapshot(db)
+
+    class _User:
+        id = user.id
+    db.close()
+
+    item_ids = [item["id"] for item in FOOD_ITEMS]
+
+    def worker(n):
+        ok = locked = 0
+        session = Session()
+        try:
+            for i in range(orders_per_thread):
+                first = (n * orders_per_thread + i) % len(item_ids)
+                items = [item_ids[first], item_ids[(first + 1) % len(item_ids)]]
+                order = OrderCreate(items=items, total_price=100, total_calories=500, total_sugar=10, total_sodium=400)
+                try:
+                    OrderService.create_order(session, _User, order, catalog)
+                    ok += 1
+                except OperationalError:
+                    session.rollback()
+                    locked += 1
+        finally:
+            session.close()
+        return ok, locked
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(worker, range(threads)))
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+
+    ok = sum(r[0] for r in results)
+    locked = sum(r[1] for r in results)
+    label = "tuned (WAL, NORMAL)" if tuned else "default"
+    print(f"{label:<20} {ok / elapsed:8.1f} orders/s  ok={ok} locked errors={locked}  ({elapsed:.2f} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--orders", type=int, default=250, help="orders per thread")
+    args = parser.parse_args()
+
+    print(f"threads={args.threads} orders/thread={args.orders}")
+    run(False, args.threads, args.orders)
+    run(True, args.threads, args.orders)
+
+
+if __name__ == '__main__':
+    main()
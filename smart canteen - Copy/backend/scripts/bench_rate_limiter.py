@@ -0,0 +1,83 @@
+"""
+Benchmark: rate limiter overhead with many distinct users.
+
+Compares the old timestamp-list limiter (defaultdict of datetimes, filtered on
+every call, never evicted) with the sliding-window counter on the in-memory and
+SQLite backends. Requests are spread over --users keys in random order.
+
+Usage:
+    python scripts/bench_rate_limiter.py [--users 10000] [--checks 200000] [--sqlite-checks 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+# Ensure imports work when running from this script location
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from services.rate_limiter import RateLimiter, MemoryBackend, SQLiteBackend
+
+LIMIT = 10
+WINDOW = 60
+
+
+class LegacyLimiter:
+    """The previous check_rate_limit logic, kept here for comparison only."""
+
+    def __init__(self):
+        self.store = defaultdict(list)
+
+    def allow(self, key):
+        now = datetime.now()
+        valid_times = [t for t in self.store[key] if (now - t).total_seconds() <= WINDOW]
+        if len(valid_times) >= LIMIT:
+            return False
+        valid_times.append(now)
+        self.store[key] = valid_times
+        return True
+
+    def __len__(self):
+        return len(self.store)
+
+
+def run(name, limiter, keys, size):
+    start = time.perf_counter()
+    allowed = sum(1 for key in keys if limiter.allow(key))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<22} {elapsed / len(keys) * 1e6:8.2f} us/check  allowed={allowed:<7} keys stored={size()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--checks", type=int, default=200000)
+    parser.add_argument("--sqlite-checks", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    keys = [f"user_{rng.randrange(args.users)}" for _ in range(args.checks)]
+    print(f"users={args.users} checks={args.checks} limit={LIMIT}/{WINDOW}s")
+
+    legacy = LegacyLimiter()
+    run("legacy timestamp list", legacy, keys, lambda: len(legacy))
+
+    memory = MemoryBackend(max_keys=args.users)
+    run("sliding window/memory", RateLimiter(LIMIT, WINDOW, memory), keys, lambda: len(memory))
+
+    # Bounded store: half the users fit, the rest are evicted in LRU order
+    bounded = MemoryBackend(max_keys=args.users // 2)
+    run("  ...max_keys=users/2", RateLimiter(LIMIT, WINDOW, bounded), keys, lambda: len(bounded))
+
+    sqlite = SQLiteBackend(os.path.join(tempfile.mkdtemp(), "rate_limit.db"))
+    run("sliding window/sqlite", RateLimiter(LIMIT, WINDOW, sqlite), keys[:args.sqlite_checks], lambda: len(sqlite))
+
+
+if __name__ == '__main__':
+    main()
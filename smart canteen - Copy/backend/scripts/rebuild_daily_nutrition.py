@@ -0,0 +1,51 @@
+"""
+Regenerate the daily_nutrition rollup from the orders table, in batches.
+
+The rollup is normally maintained in the order transaction; use this after
+editing orders by hand or restoring a backup. Safe to run while the app is
+serving orders (totals are partial until it finishes). Stored health timeline
+scores are derived from the rollup, so they are unscored and recomputed on
+the next timeline request.
+
+Usage:
+    python scripts/rebuild_daily_nutrition.py            # rebuild, then check
+    python scripts/rebuild_daily_nutrition.py --check    # only report days that disagree with orders
+"""
+import argparse
+import os
+import sys
+import time
+
+# Ensure imports work when running from this script location
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from sqlalchemy import text
+from database import engine
+from services.nutrition_rollup import NutritionRollup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="compare the rollup with orders without rebuilding")
+    parser.add_argument("--batch-size", type=int, help="orders per transaction (default MIGRATION_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        if not args.check:
+            start = time.perf_counter()
+            rows = NutritionRollup.rebuild(conn, batch_size=args.batch_size)
+            conn.execute(text("UPDATE health_timeline SET score = NULL"))
+            conn.commit()
+            print(f"Rebuilt {rows} daily_nutrition rows in {time.perf_counter() - start:.2f}s")
+
+        drift = NutritionRollup.find_drift(conn)
+        for user_id, date, rollup_orders, actual_orders in drift[:20]:
+            print(f"  user {user_id} {date}: rollup has {rollup_orders} orders, orders table has {actual_orders}")
+        print(f"{len(drift)} day(s) out of sync" if drift else "daily_nutrition matches orders")
+    return 1 if drift else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
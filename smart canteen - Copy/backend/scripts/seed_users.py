@@ -6,7 +6,8 @@ ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if ROOT not in sys.path:
     sys.path.append(ROOT)
 
-from database import SessionLocal, Base, engine
+from database import SessionLocal, engine
+from migrations.runner import run_migrations
 from models import User
 from passlib.context import CryptContext
 
@@ -35,7 +36,7 @@ def create_user(db, name, email, password, role):
 
 def main():
     # Ensure tables exist
-    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
 
     db = SessionLocal()
     try:
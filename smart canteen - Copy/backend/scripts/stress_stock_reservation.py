@@ -0,0 +1,109 @@
+"""
+Concurrency stress test for stock reservation on order placement.
+
+Fires many simultaneous orders at a low-stock item against a scratch SQLite
+database and checks that stock never goes negative, that exactly `stock`
+orders succeed, and that rejected orders leave no partial reservations.
+
+Usage:
+    python scripts/stress_stock_reservation.py [--orders 200] [--stock 7] [--workers 32]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Ensure imports work when running from this script location
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database import Base
+from models import User, Order, MenuItem
+from schemas import OrderCreate
+from services.menu_catalog import MenuCatalog
+from services.order_service import OrderService
+
+SCARCE_ID = 1
+PLENTY_ID = 2
+
+
+def run(orders, stock, workers):
+    db_path = os.path.join(tempfile.mkdtemp(), "stress.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Session()
+    user = User(name="Stress", email="stress@example.com", hashed_password="x", role="USER")
+    db.add_all([
+        user,
+        MenuItem(id=SCARCE_ID, name="Last Portion Pie", price=100, stock_quantity=stock),
+        MenuItem(id=PLENTY_ID, name="Plenty Salad", price=50, stock_quantity=orders * 2),
+    ])
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    catalog = MenuCatalog()
+    start = threading.Barrier(min(workers, orders))
+    outcomes = {"ok": 0, "rejected": 0, "errors": []}
+    lock = threading.Lock()  # guards the counters only, never the order path
+
+    class _User:
+        id = user_id
+
+    def place(n):
+        if n < start.parties:
+            start.wait()
+        session = Session()
+        try:
+            # Every order also takes a plentiful item, so a rejected order must roll both back
+            order = OrderCreate(items=[PLENTY_ID, SCARCE_ID], total_price=150, total_calories=0, total_sugar=0, total_sodium=0)
+            OrderService.create_order(session, _User, order, catalog)
+            result = "ok"
+        except HTTPException as e:
+            result = "rejected" if e.status_code == 400 else f"http {e.status_code}"
+        except Exception as e:
+            result = f"{type(e).__name__}: {e}"
+        finally:
+            session.close()
+        with lock:
+            if result in ("ok", "rejected"):
+                outcomes[result] += 1
+            else:
+                outcomes["errors"].append(result)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(place, range(orders)))
+
+    db = Session()
+    scarce = db.query(MenuItem).filter(MenuItem.id == SCARCE_ID).one().stock_quantity
+    plenty = db.query(MenuItem).filter(MenuItem.id == PLENTY_ID).one().stock_quantity
+    order_count = db.query(Order).count()
+    db.close()
+
+    print(f"orders={orders} stock={stock} workers={workers}")
+    print(f"succeeded={outcomes['ok']} rejected={outcomes['rejected']} errors={len(outcomes['errors'])}")
+    print(f"remaining scarce stock={scarce}, plentiful stock={plenty}, orders stored={order_count}")
+
+    assert not outcomes["errors"], outcomes["errors"][:5]
+    assert scarce >= 0, "Stock went negative"
+    assert outcomes["ok"] == stock and scarce == 0, "Reservations do not match initial stock"
+    assert order_count == outcomes["ok"], "Order rows do not match successful reservations"
+    assert plenty == orders * 2 - outcomes["ok"], "Rejected orders left partial reservations behind"
+    print("Stock reservation stress test passed! [OK]")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--stock", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+    run(args.orders, args.stock, args.workers)
@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class EscalationMemo:
+    """
+    Short-TTL, bounded per-user memo of NutritionAggregator.check_risk_escalation results.
+    The dashboard hits /risk and /prediction back to back; the second call (and
+    /summary) reuses the first evaluation. Entries are dropped when the user
+    places an order or edits their profile; the TTL bounds staleness across
+    worker processes, which each keep their own memo.
+    """
+
+    def __init__(self, max_entries=4096, ttl_seconds=5):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # user_id -> (expires_at, result)
+        self._epoch = 0  # bumped by every invalidation
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """(result or None, epoch). Pass the epoch back to put() after computing a miss."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires_at, result = entry
+                if time.monotonic() < expires_at:
+                    self._entries.move_to_end(user_id)
+                    return result, self._epoch
+                del self._entries[user_id]
+            return None, self._epoch
+
+    def put(self, user_id, result, epoch):
+        """Store a result computed after get() returned `epoch`; skipped if an
+        invalidation happened in between, since the result may predate it."""
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        """Forget a user's result. Call after their orders or health profile change."""
+        with self._lock:
+            self._epoch += 1
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+
+escalation_memo = EscalationMemo(
+    max_entries=int(os.environ.get("ESCALATION_MEMO_SIZE", 4096)),
+    ttl_seconds=float(os.environ.get("ESCALATION_MEMO_TTL", 5))
+)
@@ -0,0 +1,152 @@
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import func, update
+from sqlalchemy.dialects.sqlite import insert
+from models import HealthTimelinePoint, DailyNutrition, DailyLog
+from services.nutrition_aggregator import CALORIE_LIMIT, SUGAR_LIMIT, SODIUM_LIMIT
+
+POINTS = HealthTimelinePoint.__table__
+
+# A user's first timeline request scores at most this many days of history
+TIMELINE_MAX_DAYS = int(os.environ.get("TIMELINE_MAX_DAYS", 366))
+
+_insert = insert(POINTS)
+# Scoring a day never clears its "Profile Updated" flag
+SCORE_UPSERT = _insert.on_conflict_do_update(
+    index_elements=[POINTS.c.user_id, POINTS.c.date],
+    set_={"score": _insert.excluded.score, "event": _insert.excluded.event}
+)
+PROFILE_UPSERT = _insert.on_conflict_do_update(
+    index_elements=[POINTS.c.user_id, POINTS.c.date],
+    set_={"profile_updated": 1, "score": None}
+)
+
+
+class HealthTimeline:
+    """
+    Daily health scores stored in health_timeline. Completed days are scored
+    once, from the daily_nutrition rollup and the daily log, and appended
+    after the last stored point; reading the timeline is a range read plus
+    a live score for today.
+    """
+
+    @staticmethod
+    def score_day(nutrition, log, profile_updated=False):
+        """(score 0-100, event) for one day; nutrition is a daily_nutrition row and log a DailyLog, either may be None."""
+        score = 85
+        event = None
+        if nutrition is not None and nutrition.order_count:
+            if nutrition.sodium > SODIUM_LIMIT:
+                score -= min(25, 5 + (nutrition.sodium - SODIUM_LIMIT) / 100)
+                event = "High Sodium Day"
+            if nutrition.sugar > SUGAR_LIMIT:
+                score -= min(20, 5 + (nutrition.sugar - SUGAR_LIMIT) / 2)
+                event = event or "High Sugar Day"
+            if nutrition.calories > CALORIE_LIMIT:
+                score -= min(15, 5 + (nutrition.calories - CALORIE_LIMIT) / 100)
+                event = event or "Calorie Surplus"
+            event = event or "Optimal Nutrition"
+        else:
+            score -= 5
+
+        if log is not None:
+            if (log.water_intake_ml or 0) >= 2000:
+                score += 5
+            if (log.steps or 0) >= 8000:
+                score += 5
+                event = event or "Active Day"
+
+        if profile_updated:
+            event = "Profile Updated"
+        return int(max(0, min(100, round(score)))), event or "No Orders"
+
+    @staticmethod
+    def mark_profile_update(db, user_id):
+        """Flags today's point so it reads "Profile Updated". Runs inside the caller's transaction."""
+        today = datetime.now().strftime("%Y-%m-%d")
+        db.execute(PROFILE_UPSERT, [{"user_id": user_id, "date": today, "profile_updated": 1}])
+
+    @staticmethod
+    def invalidate_from(db, user_id, day):
+        """Unscores the user's points from `day` ('YYYY-MM-DD') on, e.g. after backdated orders; they are rescored on the next read."""
+        db.execute(update(HealthTimelinePoint).where(
+            HealthTimelinePoint.user_id == user_id,
+            HealthTimelinePoint.date >= day
+        ).values(score=None))
+
+    @staticmethod
+    def extend(db, user_id, today):
+        """Scores the completed days after the user's last scored point, up to yesterday. Returns how many were scored."""
+        yesterday = today - timedelta(days=1)
+        last = db.query(func.max(HealthTimelinePoint.date)).filter(
+            HealthTimelinePoint.user_id == user_id,
+            HealthTimelinePoint.score.isnot(None)
+        ).scalar()
+        if last:
+            start = datetime.strptime(last, "%Y-%m-%d").date() + timedelta(days=1)
+        else:
+            # First request: start at the user's first recorded activity
+            firsts = [
+                db.query(func.min(model.date)).filter(model.user_id == user_id).scalar()
+                for model in (DailyNutrition, DailyLog, HealthTimelinePoint)
+            ]
+            firsts = [first for first in firsts if first]
+            if not firsts:
+                return 0
+            start = datetime.strptime(min(firsts), "%Y-%m-%d").date()
+        # A user returning after a long absence is scored for the last TIMELINE_MAX_DAYS only
+        start = max(start, today - timedelta(days=TIMELINE_MAX_DAYS))
+        if start > yesterday:
+            return 0
+
+        first_day, last_day = start.isoformat(), yesterday.isoformat()
+        nutrition = {row.date: row for row in db.query(DailyNutrition).filter(
+            DailyNutrition.user_id == user_id, DailyNutrition.date.between(first_day, last_day)
+        )}
+        logs = {log.date: log for log in db.query(DailyLog).filter(
+            DailyLog.user_id == user_id, DailyLog.date.between(first_day, last_day)
+        ).order_by(DailyLog.id)}
+        flagged = {day for (day,) in db.query(HealthTimelinePoint.date).filter(
+            HealthTimelinePoint.user_id == user_id,
+            HealthTimelinePoint.date.between(first_day, last_day),
+            HealthTimelinePoint.profile_updated == 1
+        )}
+
+        points = []
+        for offset in range((yesterday - start).days + 1):
+            day = (start + timedelta(days=offset)).isoformat()
+            score, event = HealthTimeline.score_day(nutrition.get(day), logs.get(day), day in flagged)
+            points.append({"user_id": user_id, "date": day, "score": score, "event": event, "profile_updated": int(day in flagged)})
+        db.execute(SCORE_UPSERT, points)
+        return len(points)
+
+    @staticmethod
+    def get_timeline(db, user_id, days=14):
+        """
+        Points for the last `days` days, oldest first, starting no earlier than
+        the user's first activity. Stored points are appended first if any
+        completed day is missing (only once: a repeated read writes nothing);
+        today is scored live and not stored.
+        """
+        today = datetime.now().date()
+        if HealthTimeline.extend(db, user_id, today):
+            db.commit()
+
+        today_str = today.isoformat()
+        stored = db.query(HealthTimelinePoint.date, HealthTimelinePoint.score, HealthTimelinePoint.event).filter(
+            HealthTimelinePoint.user_id == user_id,
+            HealthTimelinePoint.date >= (today - timedelta(days=days - 1)).isoformat(),
+            HealthTimelinePoint.date < today_str,
+            HealthTimelinePoint.score.isnot(None)
+        ).order_by(HealthTimelinePoint.date).all()
+
+        marker = db.get(HealthTimelinePoint, (user_id, today_str))
+        log = db.query(DailyLog).filter(DailyLog.user_id == user_id, DailyLog.date == today_str).order_by(DailyLog.id.desc()).first()
+        score, event = HealthTimeline.score_day(
+            db.get(DailyNutrition, (user_id, today_str)), log, bool(marker and marker.profile_updated)
+        )
+
+        return [
+            {"date": datetime.strptime(day, "%Y-%m-%d").strftime("%b %d"), "day": day, "score": point_score, "event": point_event}
+            for day, point_score, point_event in stored + [(today_str, score, event)]
+        ]
@@ -0,0 +1,136 @@
+from collections import deque
+
+# Diet keyword groups. "meat" is what the recommender treats as non-vegetarian;
+# the chatbot additionally treats "meat_dish" names as non-vegetarian.
+MEAT_KEYWORDS = ['chicken', 'beef', 'fish', 'salmon', 'pepperoni', 'meat', 'bacon']
+MEAT_DISH_KEYWORDS = ['ham', 'tacos', 'lasagna', 'burger']
+DAIRY_KEYWORDS = ['cheese', 'milk', 'yogurt', 'cream', 'carbonara', 'egg', 'custard', 'donut', 'cake']
+LOW_GI_KEYWORDS = ['quinoa', 'oats', 'lentils', 'broccoli', 'almonds']
+
+DIET_KEYWORDS = {
+    "meat": MEAT_KEYWORDS,
+    "meat_dish": MEAT_DISH_KEYWORDS,
+    "dairy": DAIRY_KEYWORDS,
+    "low_gi": LOW_GI_KEYWORDS,
+}
+
+# Allergies offered on the health profile form, plus their singular forms
+ALLERGEN_KEYWORDS = ['nuts', 'nut', 'milk', 'seafood', 'gluten', 'soy', 'peanuts', 'peanut', 'eggs', 'egg', 'fish', 'shellfish', 'wheat', 'sesame']
+
+# Cap on memoized ad-hoc terms (allergen names outside ALLERGEN_KEYWORDS)
+MAX_EXTRA_TERMS = 256
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a fixed keyword list.
+    find() returns every keyword occurring anywhere in a text (overlaps included)
+    in a single pass, i.e. the same answer as `{k for k in keywords if k in text}`.
+    """
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [frozenset()]
+
+        for keyword in set(keywords):
+            if keyword:
+                self._insert(keyword)
+        self._build_failure_links()
+
+    def _insert(self, keyword):
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(frozenset())
+                self._goto[state][ch] = next_state
+            state = next_state
+        self._out[state] = self._out[state] | {keyword}
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                self._out[next_state] = self._out[next_state] | self._out[self._fail[next_state]]
+
+    def find(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        found = set()
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+class MenuKeywordIndex:
+    """
+    Per-menu keyword index, built once per menu version.
+    Holds, for every lowercased food name, the diet tags and known allergen terms
+    it triggers, so scorers do set lookups instead of substring scans per request.
+    """
+
+    def __init__(self, food_items, allergen_keywords=ALLERGEN_KEYWORDS):
+        self._term_group = {}
+        for group, keywords in DIET_KEYWORDS.items():
+            for keyword in keywords:
+                self._term_group.setdefault(keyword, set()).add(group)
+
+        self._vocabulary = frozenset(self._term_group) | frozenset(allergen_keywords)
+        self._matcher = KeywordMatcher(self._vocabulary)
+
+        self._terms = {}
+        self._tags = {}
+        for item in food_items:
+            self._index_name(item['name'].lower())
+
+        self._extra = {}  # ad-hoc term -> frozenset of indexed names containing it
+
+    def _index_name(self, name):
+        terms = frozenset(self._matcher.find(name))
+        self._terms[name] = terms
+        self._tags[name] = frozenset(group for term in terms for group in self._term_group.get(term, ()))
+        return terms
+
+    def terms(self, name):
+        """All vocabulary terms (diet keywords and allergens) occurring in a lowercased name."""
+        terms = self._terms.get(name)
+        if terms is None:
+            terms = frozenset(self._matcher.find(name))
+        return terms
+
+    def tags(self, name):
+        """Diet tags ('meat', 'meat_dish', 'dairy', 'low_gi') for a lowercased name."""
+        tags = self._tags.get(name)
+        if tags is None:
+            tags = frozenset(group for term in self.terms(name) for group in self._term_group.get(term, ()))
+        return tags
+
+    def contains(self, name, term):
+        """Equivalent to `term in name` for a lowercased name, answered from the index."""
+        if not term:
+            return True
+        if term in self._vocabulary:
+            return term in self.terms(name)
+        if name not in self._terms:
+            return term in name
+
+        names = self._extra.get(term)
+        if names is None:
+            names = frozenset(indexed for indexed in self._terms if term in indexed)
+            if len(self._extra) < MAX_EXTRA_TERMS:
+                self._extra[term] = names
+        return name in names
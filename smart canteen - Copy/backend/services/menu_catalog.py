@@ -0,0 +1,151 @@
+"""
+Per-process menu catalog: snapshots of menu_items with the derived indexes used
+for scoring, shared by every request until the menu changes.
+
+Staleness bounds:
+- Menu content and availability (including an item selling out) are never stale
+  once the writing transaction has committed. Writers bump the shared
+  menu_version row in their transaction and every snapshot() call compares it,
+  so all server processes reload on their next request.
+- Stock counts are not served from snapshots at all; callers overlay the live
+  levels from stock_levels() with with_live_stock(). A snapshot's own
+  stock_quantity values are only used to know which items are in stock.
+- Requests already holding a snapshot finish on it, so a response can be at
+  most one in-flight request behind a concurrent menu write.
+- Edits made outside the application (manual SQL) are only picked up after a
+  version bump or a restart.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from models import MenuItem, MenuVersion
+from services.keyword_matcher import MenuKeywordIndex
+from services.menu_matrix import MenuMatrix, compile_menu_item
+
+# Columns copied from a MenuItem row into the menu dicts served to clients
+MENU_ITEM_FIELDS = ("id", "name", "price", "image", "calories", "sugar", "protein", "sodium", "carbs", "description", "stock_quantity")
+
+
+_insert = insert(MenuVersion)
+VERSION_BUMP = _insert.values(id=1, version=1).on_conflict_do_update(
+    index_elements=[MenuVersion.id],
+    set_={"version": MenuVersion.version + 1}
+)
+VERSION_QUERY = select(MenuVersion.version).where(MenuVersion.id == 1)
+
+
+def menu_item_to_dict(row):
+    item = {field: getattr(row, field) for field in MENU_ITEM_FIELDS}
+    item["is_available"] = bool(row.is_available)
+    return item
+
+
+def with_live_stock(items, stock):
+    """Copies of menu item dicts with stock_quantity replaced by the live level from stock_levels()."""
+    return [{**item, "stock_quantity": stock.get(item["id"], item["stock_quantity"])} for item in items]
+
+
+class MenuSnapshot:
+    """
+    Read-only view of the menu at one catalog version: the item list, an id-keyed
+    index for O(1) lookups, and the keyword index, compiled item records and
+    nutrient matrix used by scoring.
+    """
+    __slots__ = ("version", "digest", "items", "by_id", "keyword_index", "records", "matrix")
+
+    def __init__(self, version, items):
+        self.version = version
+        # Content hash: identical across workers/restarts for the same menu (used in ETags)
+        self.digest = hashlib.sha1(json.dumps(items, sort_keys=True).encode("utf-8")).hexdigest()
+        self.items = items
+        self.by_id = {item["id"]: item for item in items}
+        self.keyword_index = MenuKeywordIndex(items)
+        # Menu compilation: static per-item attributes are derived once per version
+        self.records = tuple(compile_menu_item(item, self.keyword_index) for item in items)
+        self.matrix = MenuMatrix(self.records, keyword_index=self.keyword_index)
+
+    def get(self, item_id):
+        return self.by_id.get(item_id)
+
+
+class MenuCatalog:
+    """
+    In-process cache of the menu_items table.
+    The snapshot is rebuilt lazily when the shared menu_version row moves (or
+    after invalidate()), so admins can edit the menu without restarting the server.
+    """
+
+    def __init__(self, seed_items=()):
+        self.seed_items = seed_items
+        self._snapshot = None
+        self._version = 0
+        self._db_version = None  # menu_version value the snapshot was loaded at
+        self._stale = True
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def bump_version(db):
+        """Record a menu change in the caller's transaction; every process reloads once it commits."""
+        db.execute(VERSION_BUMP)
+
+    @staticmethod
+    def stock_levels(db):
+        """Live {item_id: stock_quantity}; snapshots do not track stock counts."""
+        return dict(db.execute(select(MenuItem.id, MenuItem.stock_quantity)).all())
+
+    def snapshot(self, db):
+        """Current MenuSnapshot, reloading from the database if a write happened since the last load."""
+        # No query before the first load: nothing may yield to another coroutine
+        # between the checks below and taking the lock
+        if self._snapshot is not None and db.execute(VERSION_QUERY).scalar() != self._db_version:
+            self._stale = True
+        if self._stale or self._snapshot is None:
+            # Only the first load waits for the lock. Later reloads keep serving the previous
+            # snapshot while one caller rebuilds it, so an async caller holding the lock across
+            # an await can never block another coroutine on the same thread.
+            if self._lock.acquire(blocking=self._snapshot is None):
+                try:
+                    if self._stale or self._snapshot is None:
+                        self._reload(db)
+                finally:
+                    self._lock.release()
+        return self._snapshot
+
+    async def snapshot_async(self, db):
+        """snapshot() for an AsyncSession; only touches the database when a reload is due."""
+        if not self._stale and self._snapshot is not None:
+            if (await db.execute(VERSION_QUERY)).scalar() == self._db_version:
+                return self._snapshot
+        # First load already running elsewhere: wait for it without blocking the event loop
+        while self._snapshot is None and self._lock.locked():
+            await asyncio.sleep(0.01)
+        return await db.run_sync(self.snapshot)
+
+    def invalidate(self):
+        """Mark the snapshot stale; the next snapshot() call reloads it."""
+        self._stale = True
+
+    def _reload(self, db):
+        # Clear the flag and read the version first, so a write racing with the
+        # reload leaves the snapshot behind the shared version and reloads again
+        self._stale = False
+        self._db_version = db.execute(VERSION_QUERY).scalar()
+        rows = db.query(MenuItem).order_by(MenuItem.id).all()
+        if not rows and self.seed_items:
+            self._seed(db)
+            self._db_version = db.execute(VERSION_QUERY).scalar()
+            rows = db.query(MenuItem).order_by(MenuItem.id).all()
+
+        self._version += 1
+        self._snapshot = MenuSnapshot(self._version, [menu_item_to_dict(row) for row in rows])
+        print(f"Menu catalog loaded: {len(rows)} items (version {self._version})")
+
+    def _seed(self, db):
+        """First start: populate menu_items from the built-in menu."""
+        for item in self.seed_items:
+            db.add(MenuItem(**{field: item[field] for field in MENU_ITEM_FIELDS if field in item}))
+        self.bump_version(db)
+        db.commit()
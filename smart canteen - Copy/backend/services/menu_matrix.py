@@ -0,0 +1,88 @@
+from typing import NamedTuple
+import numpy as np
+from services.keyword_matcher import MenuKeywordIndex, MAX_EXTRA_TERMS
+
+# Column order of the nutrient matrix
+NUTRIENT_COLUMNS = ("calories", "sugar", "protein", "sodium", "carbs")
+
+
+class MenuRecord(NamedTuple):
+    """
+    Immutable, precompiled view of one menu item: everything the scorers need
+    that depends only on the item, computed once per menu version.
+    """
+    item: dict
+    name_lower: str
+    diet_tags: frozenset
+    tag: str
+    available: bool
+    calories: float
+    sugar: float
+    protein: float
+    sodium: float
+    carbs: float
+
+
+def compile_menu_item(item, keyword_index):
+    """Menu compilation step: derive the static attributes of a food item dict."""
+    name_lower = item['name'].lower()
+    diet_tags = keyword_index.tags(name_lower)
+    calories, sugar, protein, sodium, carbs = (item.get(col, 0) for col in NUTRIENT_COLUMNS)
+
+    # Assign tag
+    if sugar == 0: tag = "Sugar Free"
+    elif "low_gi" in diet_tags: tag = "Low GI"
+    elif carbs < 20: tag = "Low Carb"
+    elif protein > 25: tag = "High Protein"
+    elif sugar < 5: tag = "Low Sugar"
+    else: tag = "Standard"
+
+    # Phase 6: out-of-stock / unavailable items are never scored
+    available = item.get("stock_quantity", 1) > 0 and bool(item.get("is_available", True))
+
+    return MenuRecord(item, name_lower, diet_tags, tag, available, calories, sugar, protein, sodium, carbs)
+
+
+class MenuMatrix:
+    """
+    Column-oriented snapshot of the scorable (in stock, available) part of a menu,
+    built once and reused for batch scoring. Everything that depends only on the
+    food items is computed here so that per-request work is limited to the
+    profile-dependent array operations in RecommendationService.score_menu.
+    """
+
+    def __init__(self, food_items, keyword_index=None):
+        food_items = list(food_items)
+        if keyword_index is None:
+            keyword_index = MenuKeywordIndex([f.item if isinstance(f, MenuRecord) else f for f in food_items])
+        self.keyword_index = keyword_index
+
+        records = [f if isinstance(f, MenuRecord) else compile_menu_item(f, keyword_index) for f in food_items]
+        self.records = tuple(record for record in records if record.available)
+        self.items = [record.item for record in self.records]
+        count = len(self.records)
+
+        self.names = [record.name_lower for record in self.records]
+        self.nutrients = np.array(
+            [[getattr(record, col) for col in NUTRIENT_COLUMNS] for record in self.records],
+            dtype=float
+        ).reshape(count, len(NUTRIENT_COLUMNS))
+
+        self.meat_mask = np.array(["meat" in record.diet_tags for record in self.records], dtype=bool)
+        self.tags = np.array([record.tag for record in self.records], dtype=object)
+        self._term_masks = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def column(self, name):
+        return self.nutrients[:, NUTRIENT_COLUMNS.index(name)]
+
+    def term_mask(self, term):
+        """Boolean mask of items whose lowercased name contains `term`, memoized per term."""
+        mask = self._term_masks.get(term)
+        if mask is None:
+            mask = np.array([self.keyword_index.contains(name, term) for name in self.names], dtype=bool)
+            if len(self._term_masks) < MAX_EXTRA_TERMS:
+                self._term_masks[term] = mask
+        return mask
@@ -0,0 +1,175 @@
+import numpy as np
+from datetime import datetime, timedelta
+from models import DailyNutrition, HealthProfile
+
+# Daily intake limits used by the escalation check, the health timeline and site risk alerts
+CALORIE_LIMIT = 2500
+SUGAR_LIMIT = 50
+SODIUM_LIMIT = 2300
+
+# Columns of the per-day series, in rollup order
+SERIES_FIELDS = ("calories", "sugar", "sodium", "price", "order_count")
+DAY_NAMES = np.array(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"])
+
+class NutritionAggregator:
+    """
+    Reads come from the daily_nutrition rollup (one row per user and day),
+    which OrderService keeps in step with the orders table.
+    """
+
+    @staticmethod
+    def get_daily_nutrition(db, user_id, date_str=None):
+        """
+        Calculates the sum of calories and sugar from all orders placed on a specific date.
+        """
+        if not date_str:
+            date_str = datetime.now().strftime("%Y-%m-%d")
+
+        # Primary-key lookup of the (user, day) rollup row
+        day = db.get(DailyNutrition, (user_id, date_str))
+
+        return {
+            "date": date_str,
+            "total_calories": day.calories if day else 0,
+            "total_sugar": day.sugar if day else 0,
+            "order_count": day.order_count if day else 0
+        }
+
+    @staticmethod
+    def get_weekly_sodium_trend(db, user_id):
+        """
+        Calculates the 7-day rolling average for sodium intake.
+        """
+        rows = NutritionAggregator._daily_totals(db, user_id, NutritionAggregator._week_start())
+        return NutritionAggregator._sodium_trend(rows)
+
+    @staticmethod
+    def get_recent_nutrition(db, user_id):
+        """
+        Today's totals and the 7-day sodium trend from a single rollup read.
+        Returns (daily_nutrition, sodium_trend) shaped like get_daily_nutrition
+        and get_weekly_sodium_trend.
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        rows = NutritionAggregator._daily_totals(db, user_id, NutritionAggregator._week_start())
+
+        # The week window includes today, so today's totals are one of the rows
+        _, total_calories, total_sugar, _, order_count = next(
+            (row for row in rows if row[0] == today), (today, 0, 0, 0, 0)
+        )
+        nutrition = {
+            "date": today,
+            "total_calories": total_calories,
+            "total_sugar": total_sugar,
+            "order_count": order_count
+        }
+        return nutrition, NutritionAggregator._sodium_trend(rows)
+
+    @staticmethod
+    def get_nutrition_series(db, user_id, days=7):
+        """
+        Per-day totals for the last `days` days (oldest first, today last), one
+        entry per calendar day. Days without orders are zero. One primary-key
+        range read of the rollup; the calendar is filled with numpy, so a year
+        costs about the same as a week.
+        """
+        last = np.datetime64(datetime.now().date(), "D")
+        first = last - (days - 1)
+        rows = db.query(
+            DailyNutrition.date,
+            *(getattr(DailyNutrition, field) for field in SERIES_FIELDS)
+        ).filter(
+            DailyNutrition.user_id == user_id,
+            DailyNutrition.date >= str(first),
+            DailyNutrition.date <= str(last)
+        ).all()
+
+        calendar = np.arange(first, last + 1, dtype="datetime64[D]")
+        values = np.zeros((days, len(SERIES_FIELDS)))
+        if rows:
+            offsets = (np.array([row[0] for row in rows], dtype="datetime64[D]") - first).astype(np.int64)
+            values[offsets] = [row[1:] for row in rows]
+
+        # 1970-01-01 was a Thursday
+        day_names = DAY_NAMES[(calendar.astype(np.int64) + 3) % 7]
+        columns = [values[:, i].round(1).tolist() for i in range(len(SERIES_FIELDS))]
+        columns[SERIES_FIELDS.index("order_count")] = values[:, -1].astype(np.int64).tolist()
+        return [
+            {"day": day, "day_name": name, **dict(zip(SERIES_FIELDS, totals))}
+            for day, name, *totals in zip(calendar.astype(str).tolist(), day_names.tolist(), *columns)
+        ]
+
+    @staticmethod
+    def _week_start():
+        """First day ('YYYY-MM-DD') of the rolling sodium window: seven days ago."""
+        return (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+
+    @staticmethod
+    def _daily_totals(db, user_id, since):
+        """
+        [(day, calories, sugar, sodium, order_count)] per day with orders since `since`,
+        as plain tuples: a primary-key range read of at most 8 rollup rows.
+        """
+        return [tuple(row) for row in db.query(
+            DailyNutrition.date,
+            DailyNutrition.calories,
+            DailyNutrition.sugar,
+            DailyNutrition.sodium,
+            DailyNutrition.order_count
+        ).filter(
+            DailyNutrition.user_id == user_id,
+            DailyNutrition.date >= since
+        ).order_by(DailyNutrition.date).all()]
+
+    @staticmethod
+    def _sodium_trend(rows):
+        daily_sodium = {day: sodium for day, _, _, sodium, _ in rows}
+
+        # Calculate Rolling 7-day average over the days with orders
+        days_with_data = len(daily_sodium)
+        total_weekly_sodium = sum(daily_sodium.values())
+        avg_sodium = total_weekly_sodium / days_with_data if days_with_data > 0 else 0
+
+        return {
+            "7_day_average": avg_sodium,
+            "daily_breakdown": daily_sodium
+        }
+
+    @staticmethod
+    def check_risk_escalation(db, user_id):
+        """
+        Analyzes recent consumption against thresholds to check for risk escalation.
+        """
+        profile = db.query(HealthProfile).filter(HealthProfile.user_id == user_id).first()
+        if not profile:
+            return {"escalated": False, "warnings": []}
+
+        nutrition, sodium_trend = NutritionAggregator.get_recent_nutrition(db, user_id)
+
+        warnings = []
+        is_escalated = False
+        
+        # Escalation Logic 1: Excessive Daily Calories for Obese/Overweight
+        if profile.bmi_category in ["Obese", "Overweight"] and nutrition["total_calories"] > CALORIE_LIMIT:
+            warnings.append("Daily calorie intake significantly exceeds target for weight management.")
+            is_escalated = True
+            
+        # Escalation Logic 2: Excessive Sugar for Diabetics
+        if profile.diabetes_status in ["High", "Elevated"] and nutrition["total_sugar"] > SUGAR_LIMIT:
+            warnings.append("Daily sugar intake is dangerously high for diabetic profile.")
+            is_escalated = True
+            
+        # Escalation Logic 3: Excessive 7-day average sodium for Hypertension
+        if profile.bp_status in ["Critical", "Elevated"] and sodium_trend["7_day_average"] > SODIUM_LIMIT:
+            warnings.append(f"7-day average sodium ({sodium_trend['7_day_average']:.0f}mg) exceeds hypertension limits.")
+            is_escalated = True
+            
+        return {
+            "escalated": is_escalated,
+            "warnings": warnings,
+            "current_metrics": {
+                "daily_calories": nutrition["total_calories"],
+                "daily_sugar": nutrition["total_sugar"],
+                "weekly_avg_sodium": sodium_trend["7_day_average"]
+            }
+        }
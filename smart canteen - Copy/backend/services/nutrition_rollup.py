@@ -0,0 +1,104 @@
+from collections import defaultdict
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert
+from models import DailyNutrition
+from migrations.runner import backfill_in_batches
+
+ROLLUP = DailyNutrition.__table__
+
+# Adds one order's totals to its (user, day) row; a missing row is created
+_insert = insert(ROLLUP)
+ROLLUP_UPSERT = _insert.on_conflict_do_update(
+    index_elements=[ROLLUP.c.user_id, ROLLUP.c.date],
+    set_={
+        column: ROLLUP.c[column] + _insert.excluded[column]
+        for column in ("calories", "sugar", "sodium", "price", "order_count")
+    }
+)
+
+# Same upsert fed from a rowid range of orders, used by rebuild()
+REBUILD_BATCH = text(
+    "INSERT INTO daily_nutrition (user_id, date, calories, sugar, sodium, price, order_count) "
+    "SELECT user_id, date(created_at), COALESCE(SUM(total_calories), 0), COALESCE(SUM(total_sugar), 0), "
+    "COALESCE(SUM(total_sodium), 0), COALESCE(SUM(total_price), 0), COUNT(*) "
+    "FROM orders WHERE rowid >= :batch_low AND rowid < :batch_high "
+    "AND user_id IS NOT NULL AND created_at IS NOT NULL "
+    "GROUP BY user_id, date(created_at) "
+    "ON CONFLICT (user_id, date) DO UPDATE SET "
+    "calories = calories + excluded.calories, sugar = sugar + excluded.sugar, "
+    "sodium = sodium + excluded.sodium, price = price + excluded.price, "
+    "order_count = order_count + excluded.order_count"
+)
+
+# (user_id, date) groups where the rollup and the orders table disagree
+DRIFT = text(
+    "WITH actual AS ("
+    "  SELECT user_id, date(created_at) AS date, COALESCE(SUM(total_calories), 0) AS calories, "
+    "  COALESCE(SUM(total_sugar), 0) AS sugar, COALESCE(SUM(total_sodium), 0) AS sodium, "
+    "  COALESCE(SUM(total_price), 0) AS price, COUNT(*) AS order_count "
+    "  FROM orders WHERE user_id IS NOT NULL AND created_at IS NOT NULL GROUP BY user_id, date(created_at)"
+    ") "
+    "SELECT a.user_id, a.date, r.order_count, a.order_count FROM actual a "
+    "LEFT JOIN daily_nutrition r ON r.user_id = a.user_id AND r.date = a.date "
+    "WHERE r.user_id IS NULL OR r.order_count != a.order_count "
+    "OR abs(r.calories - a.calories) > 0.001 OR abs(r.sugar - a.sugar) > 0.001 "
+    "OR abs(r.sodium - a.sodium) > 0.001 OR abs(r.price - a.price) > 0.001 "
+    "UNION ALL "
+    "SELECT r.user_id, r.date, r.order_count, 0 FROM daily_nutrition r "
+    "LEFT JOIN actual a ON a.user_id = r.user_id AND a.date = r.date WHERE a.user_id IS NULL"
+)
+
+
+class NutritionRollup:
+    """
+    daily_nutrition holds per-user, per-day sums of the orders table so the
+    escalation and trend reads touch a handful of rows instead of every order.
+    """
+
+    @staticmethod
+    def record_orders(db, orders):
+        """
+        Adds orders, given as (user_id, created_at, calories, sugar, sodium, price)
+        tuples, to daily_nutrition with one upsert per (user, day).
+        Runs inside the caller's transaction; does not commit.
+        """
+        totals = defaultdict(lambda: [0.0, 0.0, 0.0, 0.0, 0])
+        for user_id, created_at, calories, sugar, sodium, price in orders:
+            day = totals[(user_id, created_at.strftime("%Y-%m-%d"))]
+            day[0] += calories or 0
+            day[1] += sugar or 0
+            day[2] += sodium or 0
+            day[3] += price or 0
+            day[4] += 1
+        if not totals:
+            return
+        db.execute(ROLLUP_UPSERT, [
+            {"user_id": user_id, "date": date, "calories": calories, "sugar": sugar,
+             "sodium": sodium, "price": price, "order_count": order_count}
+            for (user_id, date), (calories, sugar, sodium, price, order_count) in totals.items()
+        ])
+
+    @staticmethod
+    def rebuild(conn, batch_size=None, pause=None):
+        """
+        Regenerates daily_nutrition from orders in rowid batches (conn is a
+        SQLAlchemy Connection). The table is emptied and the last order rowid is
+        read in one write transaction: orders committed afterwards are counted by
+        record_orders only, older ones by the batches. Reads see partial totals
+        until the rebuild finishes. Returns the number of (user, day) rows written.
+        """
+        conn.commit()
+        conn.execute(text("DELETE FROM daily_nutrition"))
+        high = conn.execute(text("SELECT MAX(rowid) FROM orders")).scalar()
+        conn.commit()
+
+        def rebuild_batch(conn, batch_low, batch_high):
+            return conn.execute(REBUILD_BATCH, {"batch_low": batch_low, "batch_high": batch_high}).rowcount
+
+        backfill_in_batches(conn, "orders", rebuild_batch, batch_size, pause, high=high)
+        return conn.execute(text("SELECT COUNT(*) FROM daily_nutrition")).scalar()
+
+    @staticmethod
+    def find_drift(conn):
+        """[(user_id, date, rollup_orders, actual_orders)] for every day where daily_nutrition disagrees with orders."""
+        return [tuple(row) for row in conn.execute(DRIFT)]
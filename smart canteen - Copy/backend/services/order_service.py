@@ -1,48 +1,276 @@
 import json
+from collections import Counter
+from datetime import datetime
 from fastapi import HTTPException
-from models import Order
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from models import Order, OrderItem, MenuItem
+from services.nutrition_rollup import NutritionRollup
+from services.site_counters import SiteCounters
+from services.escalation_memo import escalation_memo
+from services.menu_catalog import MenuCatalog
+from services.health_timeline import HealthTimeline
 
 class OrderService:
     @staticmethod
-    def create_order(db, current_user, order_data, food_db):
+    def create_order(db, current_user, order_data, catalog):
         """
         Creates an order but strictly validates stock first (Phase 6).
+        Stock for every item is reserved, and the daily_nutrition rollup and
+        site counters updated, in the same transaction as the order insert.
+        """
+        menu = catalog.snapshot(db)
+        quantities = OrderService.count_items(order_data, menu)
+        OrderService.reserve_stock(db, quantities, menu)
+
+        new_order = Order(
+            user_id=current_user.id,
+            items=json.dumps(order_data.items),
+            total_price=order_data.total_price,
+            total_calories=order_data.total_calories,
+            total_sugar=order_data.total_sugar,
+            total_sodium=order_data.total_sodium,
+            created_at=datetime.now()
+        )
+        db.add(new_order)
+        db.flush()  # assigns new_order.id for the order lines
+        db.add_all(OrderService.build_order_items(new_order.id, quantities, menu))
+        OrderService.record_totals(db, [OrderService.rollup_entry(new_order)])
+        db.commit()
+        db.refresh(new_order)
+        escalation_memo.invalidate_user(current_user.id)
+        return new_order
+
+    @staticmethod
+    def create_orders_bulk(db, current_user, entries, catalog):
+        """
+        Ingests a batch of queued kiosk orders in one transaction.
+        Every order is validated like create_order; orders whose client_key was
+        already ingested are reported as duplicates, invalid or unfillable ones
+        as rejected, and the rest are inserted with one executemany per table.
+        Returns the counts and one result per entry, in request order.
+        """
+        if not entries:
+            raise HTTPException(status_code=400, detail="Order batch cannot be empty.")
+
+        menu = catalog.snapshot(db)
+        results = [None] * len(entries)
+        existing = dict(db.query(Order.client_key, Order.id).filter(
+            Order.user_id == current_user.id,
+            Order.client_key.in_({entry.client_key for entry in entries})
+        ).all())
+
+        # One validation pass against the catalog snapshot
+        accepted = []  # (index, entry, quantities)
+        first_index = {}
+        for index, entry in enumerate(entries):
+            if entry.client_key in existing or entry.client_key in first_index:
+                results[index] = {"client_key": entry.client_key, "status": "duplicate", "order_id": existing.get(entry.client_key)}
+                continue
+            try:
+                quantities = OrderService.count_items(entry, menu)
+            except HTTPException as e:
+                results[index] = {"client_key": entry.client_key, "status": "rejected", "detail": e.detail}
+                continue
+            first_index[entry.client_key] = index
+            accepted.append((index, entry, quantities))
+
+        # Orders are filled in request order from the live stock, like separate requests would be
+        wanted = set().union(*(quantities for _, _, quantities in accepted))
+        stock = dict(db.query(MenuItem.id, MenuItem.stock_quantity).filter(
+            MenuItem.id.in_(wanted),
+            MenuItem.is_available == 1
+        ).all()) if wanted else {}
+        to_insert = []
+        total = Counter()
+        for index, entry, quantities in accepted:
+            short = next((item_id for item_id, qty in quantities.items() if stock.get(item_id, 0) < qty), None)
+            if short is not None:
+                name = menu.get(short)["name"] if menu.get(short) else short
+                results[index] = {"client_key": entry.client_key, "status": "rejected", "detail": f"Item {name} is out of stock."}
+                del first_index[entry.client_key]
+                continue
+            for item_id, qty in quantities.items():
+                stock[item_id] -= qty
+            total.update(quantities)
+            to_insert.append((index, entry, quantities))
+
+        if to_insert:
+            try:
+                OrderService.reserve_stock(db, total, menu)
+                now = datetime.now()
+                order_rows = [
+                    {
+                        "user_id": current_user.id,
+                        "items": json.dumps(entry.items),
+                        "total_price": entry.total_price,
+                        "total_calories": entry.total_calories,
+                        "total_sugar": entry.total_sugar,
+                        "total_sodium": entry.total_sodium,
+                        "created_at": OrderService.placed_at(entry, now),
+                        "client_key": entry.client_key
+                    }
+                    for _, entry, _ in to_insert
+                ]
+                order_ids = db.execute(
+                    insert(Order).returning(Order.id, sort_by_parameter_order=True),
+                    order_rows
+                ).scalars().all()
+                db.execute(insert(OrderItem), [
+                    row
+                    for order_id, (_, _, quantities) in zip(order_ids, to_insert)
+                    for row in OrderService.order_item_rows(order_id, quantities, menu)
+                ])
+                OrderService.record_totals(db, [
+                    (row["user_id"], row["created_at"], row["total_calories"], row["total_sugar"],
+                     row["total_sodium"], row["total_price"])
+                    for row in order_rows
+                ])
+                # Orders placed on already-scored days: rescore those timeline points,
+                # and recount site counters since alerts depend on placement order
+                earliest = min(row["created_at"] for row in order_rows).strftime("%Y-%m-%d")
+                if earliest < now.strftime("%Y-%m-%d"):
+                    HealthTimeline.invalidate_from(db, current_user.id, earliest)
+                    SiteCounters.recount(db, earliest)
+                db.commit()
+            except (HTTPException, IntegrityError):
+                # Another upload of the same batch or a concurrent order got there
+                # first; nothing was written, and replaying the batch is safe
+                db.rollback()
+                raise HTTPException(status_code=409, detail="Stock or orders changed during ingestion; retry the batch.")
+
+            for order_id, (index, entry, _) in zip(order_ids, to_insert):
+                results[index] = {"client_key": entry.client_key, "status": "created", "order_id": order_id}
+            escalation_memo.invalidate_user(current_user.id)
+
+        # Repeats of a key inside the batch point at the order created for its first occurrence
+        for result in results:
+            if result["status"] == "duplicate" and result["order_id"] is None:
+                if result["client_key"] in first_index:
+                    result["order_id"] = results[first_index[result["client_key"]]]["order_id"]
+                else:
+                    result.update(status="rejected", detail="Repeats an order of this batch that was rejected.")
+
+        statuses = Counter(result["status"] for result in results)
+        return {
+            "created": statuses["created"],
+            "duplicates": statuses["duplicate"],
+            "rejected": statuses["rejected"],
+            "results": results
+        }
+
+    @staticmethod
+    def record_totals(db, entries):
+        """
+        Adds orders, as rollup_entry tuples, to the site counters and the
+        daily_nutrition rollup inside the caller's transaction. Site counters
+        go first: their risk alerts compare against the day totals before these orders.
+        """
+        SiteCounters.record_orders(db, entries)
+        NutritionRollup.record_orders(db, entries)
+
+    @staticmethod
+    def rollup_entry(order):
+        """(user_id, created_at, calories, sugar, sodium, price) of an Order, as NutritionRollup.record_orders takes it."""
+        return (order.user_id, order.created_at, order.total_calories, order.total_sugar,
+                order.total_sodium, order.total_price)
+
+    @staticmethod
+    def placed_at(entry, now):
+        """Time the kiosk took the order (local, naive), never later than now."""
+        placed = getattr(entry, "placed_at", None)
+        if placed is None:
+            return now
+        if placed.tzinfo is not None:
+            placed = placed.astimezone().replace(tzinfo=None)
+        return min(placed, now)
+
+    @staticmethod
+    def count_items(order_data, menu):
+        """
+        {item_id: qty} for an order, validated against the menu catalog snapshot (Phase 6).
+        Raises HTTPException for empty orders, unknown items and items out of stock.
         """
         if not order_data.items:
             raise HTTPException(status_code=400, detail="Order items cannot be empty.")
 
-        # Simulate stock validation against the pseudo-database of food items
+        quantities = Counter()
+
+        # Fast validation against the current menu catalog snapshot
         for order_item in order_data.items:
             # Assuming items look like {"id": 101, "quantity": 1} or just IDs depending on how frontend sends it
             # The original code sent a JSON list. We'll extract IDs.
             item_id = order_item.get("id") if isinstance(order_item, dict) else order_item
-            
-            # Find in DB
-            db_item = next((f for f in food_db if f["id"] == item_id), None)
-            
+
+            # O(1) lookup in the current menu catalog snapshot
+            db_item = menu.get(item_id)
+
             if not db_item:
                 raise HTTPException(status_code=404, detail=f"Food item {item_id} not found.")
 
             # Validate stock (Phase 6 compliance)
-            # We assume FOOD_ITEMS dict might get generic 'stock_quantity' added to it
-            current_stock = db_item.get("stock_quantity", 10)  # default to 10 if not defined yet
+            current_stock = db_item.get("stock_quantity", 10)
             is_available = db_item.get("is_available", True)
 
             if current_stock <= 0 or not is_available:
                 raise HTTPException(status_code=400, detail=f"Item {db_item['name']} is out of stock.")
-                
-            # If we had a real database for food items, we would decrement stock here:
-            # db_item.stock_quantity -= 1
 
-        new_order = Order(
-            user_id=current_user.id,
-            items=json.dumps(order_data.items),
-            total_price=order_data.total_price,
-            total_calories=order_data.total_calories,
-            total_sugar=order_data.total_sugar,
-            total_sodium=order_data.total_sodium
-        )
-        db.add(new_order)
-        db.commit()
-        db.refresh(new_order)
-        return new_order
+            quantities[item_id] += 1
+
+        return quantities
+
+    @staticmethod
+    def build_order_items(order_id, quantities, menu):
+        """OrderItem objects for {item_id: qty}, with per-unit nutrients and price from the menu snapshot."""
+        return [OrderItem(**row) for row in OrderService.order_item_rows(order_id, quantities, menu)]
+
+    @staticmethod
+    def order_item_rows(order_id, quantities, menu):
+        """order_items rows (dicts) for {item_id: qty}, for executemany inserts."""
+        rows = []
+        for item_id, qty in quantities.items():
+            item = menu.get(item_id) or {}
+            rows.append({
+                "order_id": order_id,
+                "item_id": item_id,
+                "qty": qty,
+                "calories": item.get("calories"),
+                "sugar": item.get("sugar"),
+                "sodium": item.get("sodium"),
+                "price": item.get("price")
+            })
+        return rows
+
+    @staticmethod
+    def reserve_stock(db, quantities, menu):
+        """
+        Decrements stock for every {item_id: qty} with a conditional UPDATE
+        (stock_quantity >= qty), inside the caller's open transaction.
+        If any item cannot be reserved the whole transaction is rolled back.
+        When an item reaches zero stock the menu version is bumped in the same
+        transaction, so every process drops it from the scored menu.
+        Does not commit; the caller commits together with the order insert.
+        """
+        # Fixed update order keeps lock acquisition consistent between concurrent orders
+        for item_id in sorted(quantities):
+            qty = quantities[item_id]
+            reserved = db.query(MenuItem).filter(
+                MenuItem.id == item_id,
+                MenuItem.is_available == 1,
+                MenuItem.stock_quantity >= qty
+            ).update(
+                {MenuItem.stock_quantity: MenuItem.stock_quantity - qty},
+                synchronize_session=False
+            )
+
+            if reserved != 1:
+                db.rollback()
+                name = menu.get(item_id)["name"] if menu.get(item_id) else item_id
+                raise HTTPException(status_code=400, detail=f"Item {name} is out of stock.")
+
+        sold_out = db.query(MenuItem.id).filter(
+            MenuItem.id.in_(list(quantities)),
+            MenuItem.stock_quantity <= 0
+        ).first()
+        if sold_out is not None:
+            MenuCatalog.bump_version(db)
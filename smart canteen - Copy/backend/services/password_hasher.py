@@ -0,0 +1,93 @@
+"""
+Password hashing off the event loop.
+
+pbkdf2_sha256 is deliberately slow CPU work. In sync auth routes it runs on
+FastAPI's shared threadpool, so a login burst takes every thread and the other
+sync routes queue behind it. PasswordHasher runs hash/verify in a process pool so bursts
+spread across cores, caps how many run at once, and rejects callers that wait
+too long for a slot instead of letting the backlog grow without bound.
+
+Config (env):
+    HASH_WORKERS          pool processes (default: CPU count; 0 = run in a thread instead)
+    HASH_MAX_CONCURRENCY  hash/verify calls allowed in flight (default: 2 x workers)
+    HASH_QUEUE_TIMEOUT    seconds to wait for a slot before answering 503 (default: 10)
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+# Password hashing context (also created inside every pool process)
+pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+
+
+def _hash(password):
+    return pwd_context.hash(password)
+
+
+def _verify(password, hashed):
+    return pwd_context.verify(password, hashed)
+
+
+class PasswordHasher:
+    def __init__(self, workers=None, max_concurrency=None, queue_timeout=10.0):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_concurrency = max_concurrency or max(1, self.workers) * 2
+        self.queue_timeout = queue_timeout
+        self._slots = None
+        self._slots_loop = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self):
+        # Started on first use so importing the app (scripts, tests) does not spawn processes
+        if self.workers <= 0:
+            return None  # default thread executor
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def _semaphore(self):
+        # asyncio primitives belong to one event loop; uvicorn runs a single loop per worker
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._slots_loop = loop
+        return self._slots
+
+    async def _run(self, fn, *args):
+        slots = self._semaphore()
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy. Please try again shortly.",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor(), fn, *args)
+        finally:
+            slots.release()
+
+    async def hash(self, password):
+        return await self._run(_hash, password)
+
+    async def verify(self, password, hashed):
+        return await self._run(_verify, password, hashed)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+password_hasher = PasswordHasher(
+    workers=int(os.environ["HASH_WORKERS"]) if os.environ.get("HASH_WORKERS") else None,
+    max_concurrency=int(os.environ.get("HASH_MAX_CONCURRENCY", 0)) or None,
+    queue_timeout=float(os.environ.get("HASH_QUEUE_TIMEOUT", 10)),
+)
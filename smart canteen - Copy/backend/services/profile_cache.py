@@ -0,0 +1,78 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# HealthProfile columns stored as JSON strings, with the value used when empty or invalid
+JSON_FIELDS = (("disease", list), ("severity", dict), ("health_values", dict), ("allergies", list))
+
+
+def decode_json_field(raw, default_type):
+    """Decode one JSON column; empty, "None", malformed or wrongly-typed values give an empty default."""
+    if isinstance(raw, default_type):
+        return raw
+    if not raw or raw == "None":
+        return default_type()
+    try:
+        value = json.loads(raw)
+    except (ValueError, TypeError):
+        return default_type()
+    return value if isinstance(value, default_type) else default_type()
+
+
+class ParsedProfile:
+    """
+    Decoded JSON columns of one HealthProfile row.
+    Instances are shared between requests through the cache: treat them as read-only.
+    """
+    __slots__ = ("user_id", "version", "raw", "disease", "severity", "health_values", "allergies")
+
+    def __init__(self, profile):
+        self.user_id = profile.user_id
+        self.version = profile.version or 0
+        self.raw = tuple(getattr(profile, field) for field, _ in JSON_FIELDS)
+        for (field, default_type), raw in zip(JSON_FIELDS, self.raw):
+            setattr(self, field, decode_json_field(raw, default_type))
+
+
+class ProfileCache:
+    """
+    Bounded LRU of ParsedProfile keyed by (user_id, version), so the JSON columns
+    are decoded once per profile change instead of once per read.
+    A hit is only used if the raw column strings still match, which keeps results
+    correct for rows modified in the current transaction before their version bump.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, profile):
+        key = (profile.user_id, profile.version or 0)
+        with self._lock:
+            parsed = self._entries.get(key)
+            if parsed is not None:
+                if all(a is b or a == b for a, b in zip(parsed.raw, (getattr(profile, f) for f, _ in JSON_FIELDS))):
+                    self._entries.move_to_end(key)
+                    return parsed
+
+        parsed = ParsedProfile(profile)
+        with self._lock:
+            self._entries[key] = parsed
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return parsed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+profile_cache = ProfileCache(max_entries=int(os.environ.get("PROFILE_CACHE_SIZE", 4096)))
+
+
+def parse_profile(profile):
+    """ParsedProfile for a HealthProfile row, from the per-process cache when possible."""
+    return profile_cache.get(profile)
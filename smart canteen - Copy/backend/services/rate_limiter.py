@@ -0,0 +1,152 @@
+"""
+Sliding-window-counter rate limiting with pluggable storage.
+
+Each key keeps only three numbers: the start of the current fixed window, the
+count in the previous window and the count in the current one. The request rate
+is estimated as prev * (overlap of the sliding window with the previous window)
++ curr, so every check is O(1) in time and memory regardless of the limit.
+
+Backends:
+    memory  - per-process OrderedDict with LRU + idle-TTL eviction (default)
+    sqlite  - a small SQLite file shared by every worker process on the host
+
+Select with RATE_LIMIT_BACKEND=memory|sqlite (RATE_LIMIT_DB sets the SQLite path).
+"""
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def slide(state, now, limit, window):
+    """
+    Apply one request to a (window_start, prev, curr) state.
+    Returns (new_state, allowed). Rejected requests are not counted.
+    """
+    current_start = now - (now % window)
+    if state is None:
+        start, prev, curr = current_start, 0, 0
+    else:
+        start, prev, curr = state
+        if current_start != start:
+            # Roll forward; if more than one window passed, the previous one was empty
+            prev = curr if current_start - start == window else 0
+            curr = 0
+            start = current_start
+
+    estimated = prev * (1 - (now - start) / window) + curr
+    if estimated >= limit:
+        return (start, prev, curr), False
+    return (start, prev, curr + 1), True
+
+
+class MemoryBackend:
+    """
+    In-process store, bounded by max_keys. Keys are kept in least-recently-used order,
+    so idle keys (untouched for two windows, i.e. carrying no state that matters)
+    collect at the front and are evicted a few at a time on every check.
+    """
+
+    EVICT_PER_CHECK = 2
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, now, limit, window):
+        with self._lock:
+            state, allowed = slide(self._states.get(key), now, limit, window)
+            self._states[key] = state
+            self._states.move_to_end(key)
+
+            while len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+            for _ in range(self.EVICT_PER_CHECK):
+                oldest_key, (start, _, _) = next(iter(self._states.items()))
+                if start > now - 2 * window:
+                    break
+                del self._states[oldest_key]
+            return allowed
+
+    def __len__(self):
+        return len(self._states)
+
+
+class SQLiteBackend:
+    """
+    Host-wide store shared by all uvicorn workers through one SQLite file.
+    Each check is a single short IMMEDIATE transaction on a one-row primary key lookup.
+    Checks block (up to the 5 s busy timeout), so call them off the event loop.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._checks = itertools.count(1)  # next() on a count is atomic, safe across threadpool threads
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "key TEXT PRIMARY KEY, window_start REAL NOT NULL, prev INTEGER NOT NULL, curr INTEGER NOT NULL)"
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key, now, limit, window):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT window_start, prev, curr FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            state, allowed = slide(row, now, limit, window)
+            if state != row:
+                conn.execute("INSERT OR REPLACE INTO rate_limits (key, window_start, prev, curr) VALUES (?, ?, ?, ?)", (key, *state))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if next(self._checks) % self.PRUNE_EVERY == 0:
+            self.prune(now, window)
+        return allowed
+
+    def prune(self, now, window):
+        """Delete keys idle for two full windows."""
+        self._connection().execute("DELETE FROM rate_limits WHERE window_start <= ?", (now - 2 * window,))
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+
+class RateLimiter:
+    """Allows up to `limit` requests per `window` seconds per key."""
+
+    def __init__(self, limit, window, backend):
+        self.limit = limit
+        self.window = window
+        self.backend = backend
+
+    def allow(self, key, now=None):
+        return self.backend.hit(key, time.time() if now is None else now, self.limit, self.window)
+
+
+def build_backend(name=None):
+    name = (name or os.environ.get("RATE_LIMIT_BACKEND", "memory")).lower()
+    if name == "memory":
+        return MemoryBackend(max_keys=int(os.environ.get("RATE_LIMIT_MAX_KEYS", 100000)))
+    if name == "sqlite":
+        return SQLiteBackend(os.environ.get("RATE_LIMIT_DB", os.path.join(BASE_DIR, "rate_limit.db")))
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {name}")
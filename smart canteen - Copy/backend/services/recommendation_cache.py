@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Profile fields the scored menu depends on
+FINGERPRINT_FIELDS = ("disease", "severity", "allergies", "dietary_preference", "age", "bmi")
+
+
+class RecommendationCache:
+    """
+    Bounded LRU cache of scored menus keyed by (profile fingerprint, menu version).
+    Users with the same profile shape share one entry, so most menu requests
+    become a dictionary lookup instead of a full re-score.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._user_keys = {}  # user_id -> key last served to that user
+        self._key_users = {}  # key -> user_ids whose last served key it is
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(profile_dict):
+        raw = json.dumps([profile_dict.get(field) for field in FINGERPRINT_FIELDS], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _track(self, user_id, key):
+        # Caller holds the lock. Moves the user onto key so both maps only reference live entries.
+        previous = self._user_keys.get(user_id)
+        if previous == key:
+            return
+        if previous is not None:
+            users = self._key_users.get(previous)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self._key_users[previous]
+        self._user_keys[user_id] = key
+        self._key_users.setdefault(key, set()).add(user_id)
+
+    def _drop(self, key):
+        # Caller holds the lock. Removes an entry and every user mapping that points at it.
+        self._entries.pop(key, None)
+        for user_id in self._key_users.pop(key, ()):
+            self._user_keys.pop(user_id, None)
+
+    def get(self, key, user_id=None):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                return None
+            self._entries.move_to_end(key)
+            if user_id is not None:
+                self._track(user_id, key)
+            return value
+
+    def put(self, key, value, user_id=None):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if user_id is not None:
+                self._track(user_id, key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        """Drop the entry last served to this user (called after profile writes)."""
+        with self._lock:
+            key = self._user_keys.get(user_id)
+            if key is not None:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+            self._key_users.clear()
+
+recommendation_cache = RecommendationCache(
+    max_entries=int(os.environ.get("RECOMMENDATION_CACHE_SIZE", 1024))
+)
@@ -1,62 +1,63 @@
-import json
-from ml_engine.inference_service import get_ml_probability
+import numpy as np
+from ml_engine.inference_service import get_ml_probability, get_ml_probabilities
 from config.severity_weights import SEVERITY_WEIGHTS
+from services.keyword_matcher import MenuKeywordIndex
+from services.menu_matrix import MenuRecord, compile_menu_item
+from services.profile_cache import decode_json_field
+
+# Shared fallback for callers without a menu snapshot; an index with no menu
+# names never memoizes anything, so one instance is safe to share
+EMPTY_KEYWORD_INDEX = MenuKeywordIndex([])
 
 class RecommendationService:
-    def __init__(self, alpha=0.6):
+    def __init__(self, alpha=0.6, keyword_index=None):
         # α = 0.6 (rule-heavy for medical safety)
         self.alpha = alpha
+        # Precompiled keyword tags for the current menu; unknown names are matched on the fly
+        self.keyword_index = keyword_index if keyword_index is not None else EMPTY_KEYWORD_INDEX
         
     def _parse_lists(self, raw_data):
-        if not raw_data or raw_data == "None":
-            return []
-        if isinstance(raw_data, str):
-            try:
-                return json.loads(raw_data)
-            except:
-                return []
-        return raw_data
-
-    def evaluate_food_item(self, food_item, profile_dict):
+        # Routes pass lists already decoded by the parsed-profile cache
+        return decode_json_field(raw_data, list)
+
+    def _parse_severity(self, severity):
+        return decode_json_field(severity, dict)
+
+    def _allergen_label(self, alg, alg_name):
+        return alg.get('name', alg_name) if isinstance(alg, dict) else alg_name
+
+    def build_profile_context(self, profile_dict):
+        """Parse the profile-dependent inputs once per request."""
+        return ProfileContext(self, profile_dict)
+
+    def _compile(self, food_item):
+        if isinstance(food_item, MenuRecord):
+            return food_item
+        return compile_menu_item(food_item, self.keyword_index)
+
+    def evaluate_food_item(self, food_item, profile_dict, profile_context=None):
         """
         Evaluate a single food item combining RuleScore and MLProbability.
+        food_item may be a raw dict or a precompiled MenuRecord; only the
+        profile-dependent parts are computed here.
         Returns (final_score, risk_level, insight, tag)
         """
+        record = self._compile(food_item)
+        ctx = profile_context or self.build_profile_context(profile_dict)
+        food_name = record.name_lower
+
         # --- 1. Hard Binary Safety Filters ---
-        allergies = self._parse_lists(profile_dict.get('allergies', []))
-        diseases = [d.lower() for d in self._parse_lists(profile_dict.get('disease', []))]
-        
         # Block allergens
-        food_name = food_item['name'].lower()
-        for alg in allergies:
-            alg_name = alg.get('name', '').lower() if isinstance(alg, dict) else alg.lower() if isinstance(alg, str) else ""
-            if not alg_name: continue
-            
-            # Simple stemming for plural (e.g., 'peanuts' -> 'peanut')
-            base_alg_name = alg_name[:-1] if alg_name.endswith('s') else alg_name
-            
-            if base_alg_name in food_name or alg_name in food_name:
-                return 0, 2, f"Blocked: Contains {alg.get('name', alg_name)} (Allergen)", "Danger"
+        for label, alg_name, base_alg_name in ctx.allergens:
+            if self.keyword_index.contains(food_name, base_alg_name) or self.keyword_index.contains(food_name, alg_name):
+                return 0, 2, f"Blocked: Contains {label} (Allergen)", "Danger"
 
         # Block extreme sugar if diabetic severe
-        severity = profile_dict.get('severity', {})
-        if isinstance(severity, str):
-            try:
-                severity = json.loads(severity)
-            except:
-                severity = {}
-                
-        is_diabetic = 'diabetes' in diseases
-        diabetic_severity = severity.get("Diabetes", "Moderate")
-        
-        if is_diabetic and diabetic_severity == "Severe" and food_item.get('sugar', 0) > 15:
+        if ctx.is_diabetic and ctx.diabetic_severity == "Severe" and record.sugar > 15:
             return 0, 2, "Blocked: Excessive sugar for Severe Diabetes", "Danger"
             
         # Block high sodium if hypertension severe
-        is_hypertensive = 'hypertension' in diseases
-        ht_severity = severity.get("Hypertension", "Moderate")
-        
-        if is_hypertensive and ht_severity == "Severe" and food_item.get('sodium', 0) > 1200:
+        if ctx.is_hypertensive and ctx.ht_severity == "Severe" and record.sodium > 1200:
             return 0, 2, "Blocked: Excessive sodium for Severe Hypertension", "Danger"
 
         # --- 2. Calculate RuleScore (0-100) ---
@@ -64,25 +65,21 @@ class RecommendationService:
         penalties = []
         
         # Apply severity multipliers to penalties
-        if is_diabetic:
-            sugar_mult = SEVERITY_WEIGHTS.get(diabetic_severity, 1.0)
-            if food_item.get('sugar', 0) > 10:
-                rule_score -= 20 * sugar_mult
+        if ctx.is_diabetic:
+            if record.sugar > 10:
+                rule_score -= 20 * ctx.sugar_mult
                 penalties.append("High Sugar")
-            if food_item.get('carbs', 0) > 50:
-                rule_score -= 10 * sugar_mult
+            if record.carbs > 50:
+                rule_score -= 10 * ctx.sugar_mult
                 penalties.append("High Carbs")
                 
-        if is_hypertensive:
-            sodium_mult = SEVERITY_WEIGHTS.get(ht_severity, 1.0)
-            if food_item.get('sodium', 0) > 800:
-                rule_score -= 25 * sodium_mult
+        if ctx.is_hypertensive:
+            if record.sodium > 800:
+                rule_score -= 25 * ctx.sodium_mult
                 penalties.append("High Sodium")
 
         # Dietary preference logic
-        diet = profile_dict.get('dietary_preference', 'Non-Veg')
-        meat_keywords = ['chicken', 'beef', 'fish', 'salmon', 'pepperoni', 'meat', 'bacon']
-        if diet == 'Veg' and any(k in food_name for k in meat_keywords):
+        if ctx.diet == 'Veg' and "meat" in record.diet_tags:
             return 0, 2, "Violates Vegetarian Preference", "Danger"
             
         rule_score = max(0, min(100, rule_score))
@@ -91,7 +88,7 @@ class RecommendationService:
         normalized_rule_score = rule_score / 100.0
 
         # --- 3. Calculate MLProbability (0-1) ---
-        ml_prob = get_ml_probability(profile_dict, food_item)
+        ml_prob = get_ml_probability(profile_dict, record.item)
         
         # --- 4. Final Hybrid Score ---
         # FinalScore = α * RuleScore + (1 - α) * MLProbability
@@ -109,31 +106,26 @@ class RecommendationService:
             risk_level = 2
             insight = f"Restricted: {', '.join(penalties)}" if penalties else "High risk for your profile."
 
-        # Assign tag
-        low_gi_keywords = ['quinoa', 'oats', 'lentils', 'broccoli', 'almonds']
-        if food_item.get('sugar', 0) == 0: tag = "Sugar Free"
-        elif any(k in food_name for k in low_gi_keywords): tag = "Low GI"
-        elif food_item.get('carbs', 0) < 20: tag = "Low Carb"
-        elif food_item.get('protein', 0) > 25: tag = "High Protein"
-        elif food_item.get('sugar', 0) < 5: tag = "Low Sugar"
-        else: tag = "Standard"
-
-        return final_score, risk_level, insight, tag
+        # Tag is precomputed at menu compilation time
+        return final_score, risk_level, insight, record.tag
 
     def get_intelligent_menu(self, food_items, profile_dict):
         """
         Process the entire menu and return scored items.
         (Phase 6 Stock Synchronization is also applied before returning)
         """
+        ctx = self.build_profile_context(profile_dict)
         intelligent_menu = []
-        for item in food_items:
+        for food_item in food_items:
+            record = self._compile(food_item)
+
             # Phase 6: Ensure out-of-stock items aren't recommended
-            if item.get("stock_quantity", 1) <= 0 or not item.get("is_available", True):
+            if not record.available:
                 continue
                 
-            score, risk, insight, tag = self.evaluate_food_item(item, profile_dict)
+            score, risk, insight, tag = self.evaluate_food_item(record, profile_dict, ctx)
             
-            item_copy = item.copy()
+            item_copy = record.item.copy()
             item_copy['match_score'] = score
             item_copy['risk_level'] = risk
             item_copy['insight'] = insight
@@ -142,3 +134,124 @@ class RecommendationService:
             intelligent_menu.append(item_copy)
             
         return intelligent_menu
+
+    def score_menu(self, menu_matrix, profile_dict):
+        """
+        Batch scoring mode: evaluates a whole MenuMatrix at once using array
+        operations instead of calling evaluate_food_item per item.
+        Returns the same list get_intelligent_menu would for the same menu.
+        """
+        count = len(menu_matrix)
+        sugar = menu_matrix.column("sugar")
+        carbs = menu_matrix.column("carbs")
+        sodium = menu_matrix.column("sodium")
+        ctx = self.build_profile_context(profile_dict)
+
+        # --- 1. Hard Binary Safety Filters (first matching reason wins) ---
+        blocked = np.zeros(count, dtype=bool)
+        block_reason = np.empty(count, dtype=object)
+
+        def block(mask, reason):
+            newly_blocked = mask & ~blocked
+            block_reason[newly_blocked] = reason
+            blocked[newly_blocked] = True
+
+        for label, alg_name, base_alg_name in ctx.allergens:
+            hits = menu_matrix.term_mask(base_alg_name) | menu_matrix.term_mask(alg_name)
+            block(hits, f"Blocked: Contains {label} (Allergen)")
+
+        if ctx.is_diabetic and ctx.diabetic_severity == "Severe":
+            block(sugar > 15, "Blocked: Excessive sugar for Severe Diabetes")
+
+        if ctx.is_hypertensive and ctx.ht_severity == "Severe":
+            block(sodium > 1200, "Blocked: Excessive sodium for Severe Hypertension")
+
+        # --- 2. RuleScore, with penalties encoded as bits (sugar=1, carbs=2, sodium=4) ---
+        rule_score = np.full(count, 95.0)
+        penalty_code = np.zeros(count, dtype=int)
+
+        if ctx.is_diabetic:
+            high_sugar, high_carbs = sugar > 10, carbs > 50
+            rule_score = np.where(high_sugar, rule_score - 20 * ctx.sugar_mult, rule_score)
+            rule_score = np.where(high_carbs, rule_score - 10 * ctx.sugar_mult, rule_score)
+            penalty_code |= high_sugar * 1 | high_carbs * 2
+
+        if ctx.is_hypertensive:
+            high_sodium = sodium > 800
+            rule_score = np.where(high_sodium, rule_score - 25 * ctx.sodium_mult, rule_score)
+            penalty_code |= high_sodium * 4
+
+        if ctx.diet == 'Veg':
+            block(menu_matrix.meat_mask, "Violates Vegetarian Preference")
+
+        normalized_rule_score = np.clip(rule_score, 0, 100) / 100.0
+
+        # --- 3. MLProbability: one batched model call for the items that survived the hard filters ---
+        ml_prob = np.zeros(count)
+        open_positions = np.flatnonzero(~blocked)
+        if len(open_positions):
+            ml_prob[open_positions] = get_ml_probabilities(profile_dict, [menu_matrix.items[i] for i in open_positions])
+
+        # --- 4. Final Hybrid Score ---
+        final_probability = (self.alpha * normalized_rule_score) + ((1 - self.alpha) * ml_prob)
+        final_score = np.where(blocked, 0, (final_probability * 100).astype(int))
+        risk_level = np.where(blocked, 2, np.select([final_score >= 80, final_score >= 50], [0, 1], default=2))
+
+        insight = _INSIGHT_TABLE[risk_level, penalty_code]
+        insight[blocked] = block_reason[blocked]
+        tag = np.where(blocked, "Danger", menu_matrix.tags)
+
+        intelligent_menu = []
+        for item, score, risk, text, item_tag in zip(menu_matrix.items, final_score.tolist(), risk_level.tolist(), insight.tolist(), tag.tolist()):
+            item_copy = item.copy()
+            item_copy['match_score'] = score
+            item_copy['risk_level'] = risk
+            item_copy['insight'] = text
+            item_copy['tag'] = item_tag
+            intelligent_menu.append(item_copy)
+
+        return intelligent_menu
+
+
+class ProfileContext:
+    """Profile-dependent scoring inputs, parsed once per request instead of once per item."""
+    __slots__ = ("allergens", "is_diabetic", "diabetic_severity", "sugar_mult",
+                 "is_hypertensive", "ht_severity", "sodium_mult", "diet")
+
+    def __init__(self, service, profile_dict):
+        # (label, name, singular name) per allergy, e.g. ('Peanuts', 'peanuts', 'peanut')
+        self.allergens = []
+        for alg in service._parse_lists(profile_dict.get('allergies', [])):
+            alg_name = alg.get('name', '').lower() if isinstance(alg, dict) else alg.lower() if isinstance(alg, str) else ""
+            if not alg_name: continue
+            # Simple stemming for plural (e.g., 'peanuts' -> 'peanut')
+            base_alg_name = alg_name[:-1] if alg_name.endswith('s') else alg_name
+            self.allergens.append((service._allergen_label(alg, alg_name), alg_name, base_alg_name))
+
+        diseases = [d.lower() for d in service._parse_lists(profile_dict.get('disease', []))]
+        severity = service._parse_severity(profile_dict.get('severity', {}))
+
+        self.is_diabetic = 'diabetes' in diseases
+        self.diabetic_severity = severity.get("Diabetes", "Moderate")
+        self.sugar_mult = SEVERITY_WEIGHTS.get(self.diabetic_severity, 1.0)
+
+        self.is_hypertensive = 'hypertension' in diseases
+        self.ht_severity = severity.get("Hypertension", "Moderate")
+        self.sodium_mult = SEVERITY_WEIGHTS.get(self.ht_severity, 1.0)
+
+        self.diet = profile_dict.get('dietary_preference', 'Non-Veg')
+
+
+def _build_insight_table():
+    """Insight text indexed by [risk_level, penalty_code], mirroring evaluate_food_item."""
+    labels = ("High Sugar", "High Carbs", "High Sodium")
+    table = np.empty((3, 8), dtype=object)
+    for code in range(8):
+        penalties = [label for bit, label in enumerate(labels) if code & (1 << bit)]
+        table[0, code] = "Perfect match for your health profile."
+        table[1, code] = f"Caution: {', '.join(penalties)}" if penalties else "Moderate nutrition match."
+        table[2, code] = f"Restricted: {', '.join(penalties)}" if penalties else "High risk for your profile."
+    return table
+
+
+_INSIGHT_TABLE = _build_insight_table()
@@ -1,5 +1,5 @@
-import json
 from config.severity_weights import SEVERITY_WEIGHTS
+from services.profile_cache import parse_profile
 
 def get_bmi_category(bmi):
     if bmi < 18.5: return "Underweight"
@@ -55,10 +55,8 @@ def calculate_overall_risk(profile):
     # 2. Disease Risk (0-100 scale, weighted 40%)
     # Contribution from sugar (diabetes), sodium (hypertension), saturated fat (cholesterol)
     disease_base_score = 0
-    try:
-        severity_dict = json.loads(profile.severity) if profile.severity else {}
-    except (json.JSONDecodeError, TypeError):
-        severity_dict = {}
+    parsed = parse_profile(profile)
+    severity_dict = parsed.severity
 
     if profile.diabetes_status == "High": disease_base_score += 40 * SEVERITY_WEIGHTS.get(severity_dict.get("Diabetes", "Moderate"), 1.0)
     elif profile.diabetes_status == "Elevated": disease_base_score += 20 * SEVERITY_WEIGHTS.get(severity_dict.get("Diabetes", "Mild"), 0.5)
@@ -82,19 +80,14 @@ def calculate_overall_risk(profile):
     
     # 4. Allergy Risk (0-100 scale, weighted 15%)
     allergy_base_score = 0
-    try:
-        allergies = json.loads(profile.allergies) if profile.allergies and profile.allergies != "None" else []
-        if isinstance(allergies, list):
-            for a in allergies:
-                saf_sev = a.get("severity", "Moderate") if isinstance(a, dict) else "Moderate"
-                if saf_sev == "Severe":
-                    allergy_base_score += 50
-                elif saf_sev == "Moderate":
-                    allergy_base_score += 30
-                else:
-                    allergy_base_score += 10
-    except (json.JSONDecodeError, TypeError):
-        pass
+    for a in parsed.allergies:
+        saf_sev = a.get("severity", "Moderate") if isinstance(a, dict) else "Moderate"
+        if saf_sev == "Severe":
+            allergy_base_score += 50
+        elif saf_sev == "Moderate":
+            allergy_base_score += 30
+        else:
+            allergy_base_score += 10
     
     allergy_base_score = min(100, allergy_base_score)
     allergy_risk_score = allergy_base_score * 0.15
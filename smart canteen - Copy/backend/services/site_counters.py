@@ -0,0 +1,150 @@
+from datetime import datetime
+from sqlalchemy import text, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from models import SiteCounter, DailyNutrition
+from services.nutrition_aggregator import CALORIE_LIMIT, SUGAR_LIMIT, SODIUM_LIMIT
+
+COUNTERS = SiteCounter.__table__
+
+_insert = insert(COUNTERS)
+COUNTER_UPSERT = _insert.on_conflict_do_update(
+    index_elements=[COUNTERS.c.bucket],
+    set_={
+        column: COUNTERS.c[column] + _insert.excluded[column]
+        for column in ("orders", "revenue", "risk_alerts")
+    }
+)
+
+# Recomputes day and hour buckets from orders placed on or after :since.
+# An order is a risk alert when it takes its user's day over a daily limit
+# (running per-user, per-day totals in placement order).
+RECONCILE = text(
+    "WITH running AS ("
+    "  SELECT created_at, COALESCE(total_price, 0) AS price, "
+    "  COALESCE(total_calories, 0) AS calories, SUM(COALESCE(total_calories, 0)) OVER day_so_far AS day_calories, "
+    "  COALESCE(total_sugar, 0) AS sugar, SUM(COALESCE(total_sugar, 0)) OVER day_so_far AS day_sugar, "
+    "  COALESCE(total_sodium, 0) AS sodium, SUM(COALESCE(total_sodium, 0)) OVER day_so_far AS day_sodium "
+    "  FROM orders WHERE user_id IS NOT NULL AND created_at >= :since "
+    "  WINDOW day_so_far AS (PARTITION BY user_id, date(created_at) ORDER BY created_at, id ROWS UNBOUNDED PRECEDING)"
+    "), flagged AS ("
+    "  SELECT created_at, price, "
+    "  (day_calories > :calorie_limit AND day_calories - calories <= :calorie_limit) "
+    "  OR (day_sugar > :sugar_limit AND day_sugar - sugar <= :sugar_limit) "
+    "  OR (day_sodium > :sodium_limit AND day_sodium - sodium <= :sodium_limit) AS alert "
+    "  FROM running"
+    ") "
+    "INSERT INTO site_counters (bucket, orders, revenue, risk_alerts) "
+    "SELECT date(created_at), COUNT(*), SUM(price), SUM(alert) FROM flagged GROUP BY date(created_at) "
+    "UNION ALL "
+    "SELECT strftime('%Y-%m-%d %H', created_at), COUNT(*), SUM(price), SUM(alert) FROM flagged "
+    "GROUP BY strftime('%Y-%m-%d %H', created_at)"
+)
+
+
+def day_bucket(moment):
+    return moment.strftime("%Y-%m-%d")
+
+
+def hour_bucket(moment):
+    return moment.strftime("%Y-%m-%d %H")
+
+
+class SiteCounters:
+    """
+    Orders, revenue and risk alerts for the whole site per day and per hour,
+    so the admin dashboard reads a few primary-key rows instead of scanning orders.
+    """
+
+    @staticmethod
+    def record_orders(db, orders):
+        """
+        Counts orders, given as (user_id, created_at, calories, sugar, sodium, price)
+        tuples, into their day and hour buckets inside the caller's transaction.
+        Must run before NutritionRollup.record_orders: it reads the users' day
+        totals as they were before these orders to detect limit crossings.
+        """
+        if not orders:
+            return
+        keys = {(user_id, day_bucket(created_at)) for user_id, created_at, *_ in orders}
+        day_totals = {
+            (row.user_id, row.date): [row.calories, row.sugar, row.sodium]
+            for row in db.query(DailyNutrition).filter(
+                tuple_(DailyNutrition.user_id, DailyNutrition.date).in_(keys)
+            )
+        }
+
+        counters = {}
+        for user_id, created_at, calories, sugar, sodium, price in sorted(orders, key=lambda order: order[1]):
+            totals = day_totals.setdefault((user_id, day_bucket(created_at)), [0.0, 0.0, 0.0])
+            alert = 0
+            for i, (amount, limit) in enumerate(((calories, CALORIE_LIMIT), (sugar, SUGAR_LIMIT), (sodium, SODIUM_LIMIT))):
+                before = totals[i]
+                totals[i] = before + (amount or 0)
+                if before <= limit < totals[i]:
+                    alert = 1
+            for bucket in (day_bucket(created_at), hour_bucket(created_at)):
+                counter = counters.setdefault(bucket, [0, 0.0, 0])
+                counter[0] += 1
+                counter[1] += price or 0
+                counter[2] += alert
+
+        db.execute(COUNTER_UPSERT, [
+            {"bucket": bucket, "orders": count, "revenue": revenue, "risk_alerts": alerts}
+            for bucket, (count, revenue, alerts) in counters.items()
+        ])
+
+    @staticmethod
+    def read_day(db, day=None):
+        """Counters for one day ('YYYY-MM-DD', default today) plus its 24 hourly buckets: at most 25 primary-key rows."""
+        day = day or day_bucket(datetime.now())
+        total = db.get(SiteCounter, day)
+        hours = {
+            counter.bucket[-2:]: counter
+            for counter in db.query(SiteCounter).filter(SiteCounter.bucket.between(f"{day} 00", f"{day} 23"))
+        }
+        return {
+            "orders": total.orders if total else 0,
+            "revenue": round(total.revenue, 2) if total else 0,
+            "risk_alerts": total.risk_alerts if total else 0,
+            "by_hour": [
+                {
+                    "hour": hour,
+                    "orders": hours[f"{hour:02d}"].orders if f"{hour:02d}" in hours else 0,
+                    "revenue": round(hours[f"{hour:02d}"].revenue, 2) if f"{hour:02d}" in hours else 0
+                }
+                for hour in range(24)
+            ]
+        }
+
+    @staticmethod
+    def recount(db, since):
+        """
+        Recomputes every bucket from `since` ('YYYY-MM-DD') on from raw orders,
+        inside the caller's transaction. Used when orders are written out of
+        placement order (backdated kiosk uploads): whether an order is an alert
+        depends on the orders placed before it that day, so increments alone
+        would attribute alerts to the wrong orders.
+        """
+        db.execute(text("DELETE FROM site_counters WHERE bucket >= :since"), {"since": since})
+        db.execute(RECONCILE, {
+            "since": since,
+            "calorie_limit": CALORIE_LIMIT,
+            "sugar_limit": SUGAR_LIMIT,
+            "sodium_limit": SODIUM_LIMIT
+        })
+
+    @staticmethod
+    def reconcile(conn, since=None):
+        """
+        Rebuilds the counters from raw orders (conn is a SQLAlchemy Connection),
+        for every day or only days from `since` ('YYYY-MM-DD') on. Runs in one
+        write transaction, so order placement waits until it finishes.
+        Returns the number of buckets written.
+        """
+        since = since or "0000-00-00"
+        conn.commit()
+        SiteCounters.recount(conn, since)
+        # sqlite3 reports no rowcount for statements starting with WITH
+        written = conn.execute(text("SELECT COUNT(*) FROM site_counters WHERE bucket >= :since"), {"since": since}).scalar()
+        conn.commit()
+        return written
@@ -0,0 +1,83 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    """
+    Bounded LRU + TTL cache of authenticated bearer tokens.
+    Maps token -> (decoded claims, detached user snapshot) so that repeat requests
+    skip both jwt.decode and the users table lookup in get_current_user.
+    An entry never outlives the token's own `exp` claim.
+
+    The cache lives in one process, and so does invalidate_user: with several
+    workers, the others keep serving their copy until it expires. For up to
+    ttl_seconds a token can still carry a stale profile_completed/onboarding_step,
+    and a token issued before a password reset can still be accepted. Keep
+    TOKEN_CACHE_TTL short for multi-worker deployments (0 disables the cache).
+    """
+
+    def __init__(self, max_entries=4096, ttl_seconds=60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # token -> (expires_at, claims, user)
+        self._user_tokens = {}  # user_id -> set of cached tokens
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        """(claims, user snapshot) for a cached, unexpired token, else None."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, claims, user = entry
+            if time.time() >= expires_at:
+                self._drop(token)
+                return None
+            self._entries.move_to_end(token)
+            return claims, user
+
+    def put(self, token, claims, user):
+        expires_at = time.time() + self.ttl_seconds
+        exp = claims.get("exp")
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        with self._lock:
+            self._drop(token)
+            self._entries[token] = (expires_at, claims, user)
+            self._user_tokens.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        """Forget every token of a user, in this process only. Call after any write
+        to the users row (disable, role change, password reset, onboarding flags)."""
+        with self._lock:
+            for token in self._user_tokens.pop(user_id, ()):
+                self._entries.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_tokens.clear()
+
+    def _drop(self, token):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry[2].id
+        tokens = self._user_tokens.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._user_tokens[user_id]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache(
+    max_entries=int(os.environ.get("TOKEN_CACHE_SIZE", 4096)),
+    ttl_seconds=float(os.environ.get("TOKEN_CACHE_TTL", 60))
+)
@@ -1,9 +1,11 @@
 import asyncio
 from models import HealthProfile
-from schemas import HealthProfileCreate, OrderCreate
+from schemas import HealthProfileCreate, HealthStep1, OrderCreate
 from services.risk_engine import calculate_overall_risk
 from services.recommendation_service import RecommendationService
+from services.menu_matrix import MenuMatrix
 import json
+import random
 
 def test_phase_1_risk_scoring():
     print("--- Testing Phase 1: Risk Scoring ---")
@@ -57,10 +59,727 @@ def test_phase_2_and_6_hybrid_ml_and_stock():
     
     print("Phase 2 & 6 Passed! [OK]")
 
+def test_batch_scoring_matches_per_item():
+    print("--- Testing Batch Scoring: MenuMatrix vs evaluate_food_item ---")
+    recommender = RecommendationService(alpha=0.6)
+
+    menu = [
+        {"id": 1, "name": "Chocolate Cake", "sugar": 45, "sodium": 300, "carbs": 65, "protein": 6, "calories": 520},
+        {"id": 2, "name": "Peanut Butter Sandwich", "sugar": 5, "sodium": 200, "carbs": 30, "protein": 10, "calories": 300},
+        {"id": 3, "name": "Ramen Noodles", "sugar": 4, "sodium": 1800, "carbs": 70, "protein": 20, "calories": 550},
+        {"id": 4, "name": "Grilled Salmon", "sugar": 0, "sodium": 400, "carbs": 0, "protein": 42, "calories": 400},
+        {"id": 5, "name": "Quinoa Bowl", "sugar": 2, "sodium": 200, "carbs": 45, "protein": 14, "calories": 320},
+        {"id": 6, "name": "Fresh Green Salad", "sugar": 2, "sodium": 150, "carbs": 10, "protein": 5, "calories": 150, "stock_quantity": 0},
+        {"id": 7, "name": "Pasta Carbonara", "sugar": 12, "sodium": 1100, "carbs": 75, "protein": 25, "calories": 700},
+    ]
+    profiles = [
+        {"age": 45, "disease": ["Diabetes", "Hypertension"], "severity": {"Diabetes": "Severe", "Hypertension": "Moderate"},
+         "allergies": [{"name": "Peanuts", "severity": "Severe"}], "dietary_preference": "Veg"},
+        {"age": 30, "disease": ["Hypertension"], "severity": {"Hypertension": "Severe"}, "allergies": [], "dietary_preference": "Non-Veg"},
+        {"age": 60, "disease": ["Diabetes"], "severity": {"Diabetes": "Mild"}, "allergies": ["noodles"], "dietary_preference": "Non-Veg"},
+        {"age": 25, "disease": [], "allergies": [], "dietary_preference": "Non-Veg"},
+    ]
+
+    matrix = MenuMatrix(menu)
+    for profile in profiles:
+        # Same seed for both paths so the ML probabilities line up item by item
+        random.seed(42)
+        expected = recommender.get_intelligent_menu(menu, profile)
+        random.seed(42)
+        actual = recommender.score_menu(matrix, profile)
+        assert actual == expected, f"Batch scoring diverged for profile {profile}"
+
+    print("Batch Scoring Passed! [OK]")
+
+def test_profile_etag_conditional_get():
+    print("--- Testing Profile ETag: If-None-Match, weak tags, changes after writes ---")
+    import os
+    import tempfile
+    from fastapi import Request, Response
+    from sqlalchemy.orm import sessionmaker
+    from database import Base, create_sqlite_engine
+    from models import User
+    from health import get_health_profile, save_step1
+
+    engine = create_sqlite_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'etag.db')}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = User(name="Asha", email="asha@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)  # handlers get current_user from the auth session, not this one
+
+    def get_profile(if_none_match=None):
+        headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+        request = Request({"type": "http", "method": "GET", "path": "/api/health/profile", "headers": headers})
+        response = Response()
+        result = get_health_profile(request, response, db, user)
+        if isinstance(result, Response):
+            return result.status_code, result.headers["ETag"]
+        return 200, response.headers["ETag"]
+
+    step1 = HealthStep1(age=30, gender="Female", weight_kg=60, height_cm=165, dietary_preference="Veg")
+    save_step1(step1, db, user, True)
+
+    status, etag = get_profile()
+    assert status == 200
+    assert get_profile(etag) == (304, etag)
+    assert get_profile(f'"other", W/{etag}') == (304, etag), "weak comparison should match W/ tags"
+    assert get_profile('"other"')[0] == 200
+
+    # A profile write bumps the version, so the old tag no longer matches
+    save_step1(step1.model_copy(update={"weight_kg": 62}), db, user, True)
+    status, new_etag = get_profile(etag)
+    assert status == 200 and new_etag != etag
+
+    # The name is part of the body, so renaming the user changes the tag too
+    user.name = "Asha K"
+    status, renamed_etag = get_profile(new_etag)
+    assert status == 200 and renamed_etag != new_etag
+
+    db.close()
+    print("Profile ETag Passed! [OK]")
+
+def test_menu_catalog_shared_version():
+    print("--- Testing Menu Catalog: shared version across processes, live stock ---")
+    import os
+    import tempfile
+    from sqlalchemy.orm import sessionmaker
+    from database import Base, create_sqlite_engine
+    from models import MenuItem, User
+    from services.menu_catalog import MenuCatalog, with_live_stock
+    from services.order_service import OrderService
+
+    engine = create_sqlite_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'catalog.db')}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = User(name="Ravi", email="ravi@example.com", hashed_password="x")
+    db.add_all([user, MenuItem(id=1, name="Pie", price=100, stock_quantity=2), MenuItem(id=2, name="Salad", price=50, stock_quantity=9)])
+    db.commit()
+
+    # Two catalogs stand in for two server processes sharing one database
+    worker_a, worker_b = MenuCatalog(), MenuCatalog()
+    before = worker_b.snapshot(db)
+    order = OrderCreate(items=[1], total_price=100, total_calories=0, total_sugar=0, total_sodium=0)
+
+    # An order that leaves stock keeps the snapshot; only the live overlay changes
+    OrderService.create_order(db, user, order, worker_a)
+    assert worker_b.snapshot(db) is before
+    assert with_live_stock(before.items, MenuCatalog.stock_levels(db))[0]["stock_quantity"] == 1
+
+    # Selling out bumps the shared version, so the other process reloads
+    OrderService.create_order(db, user, order, worker_a)
+    after = worker_b.snapshot(db)
+    assert after is not before and after.get(1)["stock_quantity"] == 0
+
+    # Admin restock through the other process is seen the same way
+    db.query(MenuItem).filter(MenuItem.id == 1).update({MenuItem.stock_quantity: 5})
+    MenuCatalog.bump_version(db)
+    db.commit()
+    assert worker_a.snapshot(db).get(1)["stock_quantity"] == 5
+
+    # Admin edits are partial; an explicit null is rejected before it reaches the row
+    from pydantic import ValidationError
+    from menu import update_menu_item
+    from schemas import MenuItemUpdate
+    admin = User(name="Admin", email="admin@example.com", hashed_password="x", role="ADMIN")
+    db.add(admin)
+    db.commit()
+    updated = update_menu_item(1, MenuItemUpdate(price=120, is_available=False), db, admin)
+    assert (updated["name"], updated["price"], updated["is_available"]) == ("Pie", 120, False), updated
+    for field in ("name", "price", "calories", "stock_quantity", "is_available"):
+        try:
+            MenuItemUpdate(**{field: None})
+        except ValidationError:
+            continue
+        raise AssertionError(f"null {field} accepted")
+
+    db.close()
+    print("Menu Catalog Passed! [OK]")
+
+def test_keyword_matcher_matches_substring_scan():
+    print("--- Testing Keyword Matcher: Aho-Corasick vs substring scans ---")
+    from services.keyword_matcher import KeywordMatcher, MenuKeywordIndex, ALLERGEN_KEYWORDS, DIET_KEYWORDS, MAX_EXTRA_TERMS
+
+    rng = random.Random(3)
+    # Overlapping (she/he/hers), nested (a/ab/abc), suffix (nut/peanut) and duplicate keywords;
+    # empty keywords are ignored by the automaton
+    keywords = ["he", "she", "his", "hers", "a", "ab", "abc", "bc", "c", "nut", "peanut", "nuts", "abc", ""]
+    matcher = KeywordMatcher(keywords)
+    texts = ["", "ushers", "peanuts", "abcabc", "cba", "sheshe"] + [
+        "".join(rng.choice("abcehinprstu") for _ in range(rng.randrange(0, 30))) for _ in range(500)
+    ]
+    for text in texts:
+        assert matcher.find(text) == {k for k in keywords if k and k in text}, text
+
+    names = ["peanut butter toast", "shellfish platter", "egg fried rice", "ham & cheese", "walnut salad", "chicken nuggets"]
+    index = MenuKeywordIndex([{"name": name} for name in names])
+    vocabulary = set(ALLERGEN_KEYWORDS).union(*DIET_KEYWORDS.values())
+    outside = ["", "toast", "nugget", "ice", "a", "salad", "zzz", "peanut butter toast!"] + [
+        "".join(rng.choice("abcdefghilnoprstu") for _ in range(rng.randrange(1, 5))) for _ in range(2 * MAX_EXTRA_TERMS)
+    ]
+    unindexed = ["cheese naan", "nutella crepe", ""]
+    for name in names + unindexed:
+        for term in sorted(vocabulary) + outside:
+            assert index.contains(name, term) == (term in name), (name, term)
+    # Terms outside the vocabulary are memoized up to the cap, and still answered past it
+    assert len(index._extra) == MAX_EXTRA_TERMS, len(index._extra)
+
+    print("Keyword Matcher Passed! [OK]")
+
+def test_recommendation_cache_invalidation():
+    print("--- Testing Recommendation Cache: menu version, user invalidation, bounded user map ---")
+    from services.recommendation_cache import RecommendationCache
+
+    cache = RecommendationCache(max_entries=2)
+    profile = {"disease": ["diabetes"], "severity": {"diabetes": "High"}, "allergies": [], "age": 40, "bmi": 27.0}
+    fp = RecommendationCache.fingerprint(profile)
+
+    cache.put((fp, 1), ["menu-v1"], user_id=1)
+    assert cache.get((fp, 1), user_id=2) == ["menu-v1"], "same profile shape should share the entry"
+    # A menu write bumps menu.version, so the old entry is never looked up again
+    assert cache.get((fp, 2), user_id=1) is None
+    # A profile write for any user on the entry drops it for everyone sharing it
+    cache.invalidate_user(2)
+    assert cache.get((fp, 1), user_id=1) is None
+    assert 1 not in cache._user_keys and 2 not in cache._user_keys
+
+    # LRU eviction also removes the user mappings of the evicted entry
+    for n in range(50):
+        cache.put(("fp-%d" % n, 1), [n], user_id=100 + n)
+    assert len(cache._entries) == 2
+    assert sorted(cache._user_keys) == [148, 149], sorted(cache._user_keys)
+    assert sum(len(users) for users in cache._key_users.values()) == 2
+    # Invalidating an evicted user is a no-op and leaves live entries alone
+    cache.invalidate_user(100)
+    assert cache.get(("fp-49", 1)) == [49]
+
+    print("Recommendation Cache Passed! [OK]")
+
+def test_token_cache_and_current_user():
+    print("--- Testing Token Cache: exp clamp, fast path, invalidation after user writes ---")
+    import time
+    from datetime import datetime, timedelta
+    from jose import jwt
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from database import create_async_sqlite_engine
+    from dependencies import get_current_user, SECRET_KEY, ALGORITHM
+    from models import User
+    from auth import reset_password
+    from health import save_step1
+    from schemas import ResetPasswordRequest
+    from services.token_cache import TokenCache, token_cache
+
+    # The TTL never outlives the token's own exp; a TTL of 0 caches nothing
+    cache = TokenCache(ttl_seconds=60)
+    user = User(id=1, email="a@example.com")
+    soon = time.time() + 5
+    cache.put("t1", {"exp": soon}, user)
+    assert cache._entries["t1"][0] == soon
+    cache.put("t2", {"exp": time.time() - 1}, user)
+    assert cache.get("t2") is None and cache.get("t1") is not None
+    cache.put("t3", {}, user)
+    assert cache._entries["t3"][0] <= time.time() + 60
+    off = TokenCache(ttl_seconds=0)
+    off.put("t", {}, user)
+    assert off.get("t") is None and len(off) == 0
+
+    engine, Session = make_scratch_db("tokens.db")
+    async_engine = create_async_sqlite_engine(str(engine.url).replace("sqlite://", "sqlite+aiosqlite://"))
+    db = Session()
+    db.add(User(name="Asha", email="asha@example.com", hashed_password="x"))
+    db.commit()
+    statements = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def issue(minutes=30, **claims):
+        expire = datetime.utcnow() + timedelta(minutes=minutes)
+        return jwt.encode({"sub": "asha@example.com", "exp": expire, **claims}, SECRET_KEY, algorithm=ALGORITHM)
+
+    async def authenticate(token, rename=None):
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            current = await get_current_user(token, session)
+            if rename:
+                current.name = rename
+                await session.commit()
+            return current
+
+    token_cache.clear()
+    token = issue()
+    first = asyncio.run(authenticate(token))
+    assert len(token_cache) == 1 and statements, "first request goes to the users table"
+
+    # Fast path: merge(load=False) attaches a fresh copy without any SELECT,
+    # and writes through it still reach the database
+    statements.clear()
+    second = asyncio.run(authenticate(token, rename="Asha K"))
+    assert second is not first and second is not token_cache.get(token)[1]
+    assert not any(sql.lstrip().upper().startswith("SELECT") for sql in statements), statements
+    db.expire_all()
+    assert db.query(User).one().name == "Asha K"
+
+    # A profile write drops the user's tokens, so the next request sees the new onboarding step
+    save_step1(HealthStep1(age=30, gender="Female", weight_kg=60, height_cm=165, dietary_preference="Veg"), db, second, True)
+    assert token_cache.get(token) is None
+    assert asyncio.run(authenticate(token)).onboarding_step == 1
+
+    # So does a password reset
+    async def reset():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            return await reset_password(ResetPasswordRequest(token=issue(15, type="reset"), new_password="N3w-Passw0rd"), session)
+    assert token_cache.get(token) is not None
+    asyncio.run(reset())
+    assert token_cache.get(token) is None
+    db.expire_all()
+    assert db.query(User).one().hashed_password != "x"
+
+    token_cache.clear()
+    db.close()
+    asyncio.run(async_engine.dispose())
+    print("Token Cache Passed! [OK]")
+
+def test_rate_limiter_window_boundary():
+    print("--- Testing Rate Limiter: sliding window across the boundary (memory + sqlite) ---")
+    import os
+    import tempfile
+    from services.rate_limiter import RateLimiter, MemoryBackend, SQLiteBackend
+
+    backends = {
+        "memory": MemoryBackend(),
+        "sqlite": SQLiteBackend(os.path.join(tempfile.mkdtemp(), "rate_limit.db")),
+    }
+    for name, backend in backends.items():
+        limiter = RateLimiter(3, 10, backend)
+        # Full window: 3 allowed, the 4th rejected
+        assert [limiter.allow("u", now) for now in (100, 101, 102, 103)] == [True, True, True, False], name
+        # Right after the boundary the previous window still counts fully (3 * 1.0)
+        assert not limiter.allow("u", 110), name
+        # Half way through: 3 * 0.5 + curr, so two more fit and the third does not
+        assert [limiter.allow("u", 115) for _ in range(3)] == [True, True, False], name
+        # Two windows later nothing carries over
+        assert limiter.allow("u", 131), name
+        # Keys are independent
+        assert limiter.allow("other", 103), name
+
+    print("Rate Limiter Passed! [OK]")
+
+def make_scratch_db(name):
+    """Empty database with the current schema in a temp dir: (engine, sessionmaker)."""
+    import os
+    import tempfile
+    from sqlalchemy.orm import sessionmaker
+    from database import Base, create_sqlite_engine
+
+    engine = create_sqlite_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), name)}")
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine)
+
+def random_order(rng, user_id, created_at):
+    from models import Order
+    return Order(
+        user_id=user_id,
+        items="[101]",
+        total_price=rng.uniform(50, 400),
+        total_calories=rng.choice([None, rng.uniform(100, 900)]),
+        total_sugar=rng.uniform(0, 40),
+        total_sodium=rng.uniform(100, 1500),
+        created_at=created_at
+    )
+
+def test_sql_nutrition_aggregation_matches_python():
+    print("--- Testing Nutrition Aggregation: daily_nutrition rollup vs Python sums ---")
+    from datetime import datetime, timedelta
+    from sqlalchemy import text
+    from models import MenuItem
+    from schemas import BulkOrderEntry
+    from services.menu_catalog import MenuCatalog
+    from services.nutrition_aggregator import NutritionAggregator
+    from services.nutrition_rollup import NutritionRollup
+    from services.order_service import OrderService
+
+    engine, Session = make_scratch_db("aggregation.db")
+    db = Session()
+
+    rng = random.Random(7)
+    now = datetime.now()
+    orders = [
+        random_order(rng, rng.choice([1, 2]), now - timedelta(minutes=rng.randrange(12 * 24 * 60)))
+        for _ in range(300)
+    ]
+    # Most orders arrive before the rollup exists (rebuilt in batches), the rest incrementally
+    db.add_all(orders[:200])
+    db.commit()
+    with engine.connect() as conn:
+        NutritionRollup.rebuild(conn, batch_size=37, pause=0)
+    db.add_all(orders[200:])
+    db.flush()
+    NutritionRollup.record_orders(db, [OrderService.rollup_entry(o) for o in orders[200:]])
+    db.commit()
+    with engine.connect() as conn:
+        assert NutritionRollup.find_drift(conn) == [], "daily_nutrition drifted from orders"
+
+    week_start = datetime.combine((now - timedelta(days=7)).date(), datetime.min.time())
+    today = now.strftime("%Y-%m-%d")
+    for user_id in (1, 2, 3):
+        mine = [o for o in orders if o.user_id == user_id]
+        todays = [o for o in mine if o.created_at.strftime("%Y-%m-%d") == today]
+        sodium = {}
+        for o in mine:
+            if o.created_at >= week_start:
+                day = o.created_at.strftime("%Y-%m-%d")
+                sodium[day] = sodium.get(day, 0) + o.total_sodium
+
+        daily = NutritionAggregator.get_daily_nutrition(db, user_id)
+        trend = NutritionAggregator.get_weekly_sodium_trend(db, user_id)
+        assert daily["order_count"] == len(todays)
+        assert abs(daily["total_calories"] - sum(o.total_calories or 0 for o in todays)) < 1e-6
+        assert abs(daily["total_sugar"] - sum(o.total_sugar for o in todays)) < 1e-6
+        assert trend["daily_breakdown"].keys() == sodium.keys()
+        assert all(abs(trend["daily_breakdown"][day] - sodium[day]) < 1e-6 for day in sodium)
+        assert NutritionAggregator.get_recent_nutrition(db, user_id) == (daily, trend)
+
+    # Edge case: a kiosk replays an order backdated onto a day that is already rolled up
+    class _User:
+        id = 1
+    db.add(MenuItem(id=101, name="Margherita Pizza", price=250, calories=650, sugar=8, sodium=1200, stock_quantity=5))
+    db.commit()
+    day = (now - timedelta(days=3)).strftime("%Y-%m-%d")
+    rollup = text("SELECT order_count, calories, sodium FROM daily_nutrition WHERE user_id = 1 AND date = :day")
+    before = db.execute(rollup, {"day": day}).first()
+    assert before is not None and before[0] > 0, "expected orders on the backdated day"
+    entry = BulkOrderEntry(
+        items=[101], total_price=250, total_calories=650, total_sugar=8, total_sodium=1200,
+        client_key="replay-1", placed_at=datetime.strptime(day, "%Y-%m-%d").replace(hour=12)
+    )
+    result = OrderService.create_orders_bulk(db, _User, [entry], MenuCatalog())
+    assert result["created"] == 1, result
+    after = db.execute(rollup, {"day": day}).first()
+    assert after[0] == before[0] + 1
+    assert abs(after[1] - (before[1] + 650)) < 1e-6 and abs(after[2] - (before[2] + 1200)) < 1e-6
+    with engine.connect() as conn:
+        assert NutritionRollup.find_drift(conn) == [], "backdated order drifted daily_nutrition"
+
+    db.close()
+    engine.dispose()
+    print("Nutrition Aggregation Passed! [OK]")
+
+def test_site_counters_match_reconcile():
+    print("--- Testing Site Counters: order-transaction updates vs reconcile ---")
+    from datetime import datetime, timedelta
+    from sqlalchemy import text
+    from models import Order, MenuItem
+    from schemas import BulkOrderEntry
+    from services.menu_catalog import MenuCatalog
+    from services.order_service import OrderService
+    from services.site_counters import SiteCounters
+
+    engine, Session = make_scratch_db("counters.db")
+    db = Session()
+
+    def place(order):
+        # One order per transaction, like /api/menu/order
+        db.add(order)
+        db.flush()
+        OrderService.record_totals(db, [OrderService.rollup_entry(order)])
+        db.commit()
+
+    # Edge case first: the last microsecond of a day and the first of the next.
+    # Each order alone is over the calorie limit, so both are alerts: the
+    # running day total resets at midnight and each lands in its own hour bucket.
+    midnight = datetime.combine((datetime.now() - timedelta(days=5)).date(), datetime.min.time())
+    for moment in (midnight - timedelta(microseconds=1), midnight):
+        place(Order(user_id=9, items="[101]", total_price=10, total_calories=3000, total_sugar=0, total_sodium=0, created_at=moment))
+
+    rng = random.Random(11)
+    start = datetime.now() - timedelta(days=3)
+    for minute in sorted(rng.sample(range(3 * 24 * 60), 400)):
+        place(random_order(rng, rng.randrange(1, 6), start + timedelta(minutes=minute)))
+
+    before_midnight = SiteCounters.read_day(db, (midnight - timedelta(days=1)).strftime("%Y-%m-%d"))
+    after_midnight = SiteCounters.read_day(db, midnight.strftime("%Y-%m-%d"))
+    assert (before_midnight["orders"], before_midnight["risk_alerts"]) == (1, 1)
+    assert (after_midnight["orders"], after_midnight["risk_alerts"]) == (1, 1)
+    assert before_midnight["by_hour"][23]["orders"] == 1 and sum(h["orders"] for h in before_midnight["by_hour"]) == 1
+    assert after_midnight["by_hour"][0]["orders"] == 1 and sum(h["orders"] for h in after_midnight["by_hour"]) == 1
+
+    # A kiosk replays an order placed before the user's orders of an already-counted
+    # day; it takes the sugar limit first, so the alert moves to its hour
+    class _User:
+        id = 7
+    day = datetime.combine((start + timedelta(days=1)).date(), datetime.min.time())
+    place(Order(user_id=7, items="[101]", total_price=10, total_calories=0, total_sugar=40, total_sodium=0, created_at=day.replace(hour=14)))
+    place(Order(user_id=7, items="[101]", total_price=10, total_calories=0, total_sugar=0, total_sodium=2400, created_at=day.replace(hour=15)))
+    db.add(MenuItem(id=101, name="Margherita Pizza", price=250, stock_quantity=5))
+    db.commit()
+    entry = BulkOrderEntry(
+        items=[101], total_price=10, total_calories=0, total_sugar=20, total_sodium=0,
+        client_key="replay-1", placed_at=day.replace(hour=10)
+    )
+    assert OrderService.create_orders_bulk(db, _User, [entry], MenuCatalog())["created"] == 1
+    db.close()
+
+    query = text("SELECT bucket, orders, round(revenue, 6), risk_alerts FROM site_counters ORDER BY bucket")
+    with engine.connect() as conn:
+        incremental = conn.execute(query).all()
+        SiteCounters.reconcile(conn)
+        reconciled = conn.execute(query).all()
+    engine.dispose()
+
+    assert incremental == reconciled, "site counters drifted from orders"
+    assert sum(row[3] for row in reconciled if len(row[0]) == 10) > 2, "expected some risk alerts"
+    print("Site Counters Passed! [OK]")
+
+def test_bulk_order_replay_is_idempotent():
+    print("--- Testing Bulk Orders: replaying a batch creates nothing new ---")
+    from sqlalchemy import text
+    from models import MenuItem
+    from schemas import BulkOrderEntry
+    from services.menu_catalog import MenuCatalog
+    from services.order_service import OrderService
+
+    engine, Session = make_scratch_db("bulk.db")
+    db = Session()
+    db.add_all([
+        MenuItem(id=101, name="Margherita Pizza", price=250, calories=650, sugar=8, sodium=1200, stock_quantity=10),
+        MenuItem(id=102, name="Fresh Green Salad", price=180, calories=150, sugar=2, sodium=150, stock_quantity=1),
+    ])
+    db.commit()
+
+    class _User:
+        id = 1
+
+    def entry(key, items):
+        return BulkOrderEntry(items=items, total_price=100, total_calories=500, total_sugar=10, total_sodium=900, client_key=key)
+
+    batch = [
+        entry("k1", [101]),
+        entry("k2", [101, 101]),
+        entry("k1", [101]),        # repeated inside the batch
+        entry("k3", [102, 102]),   # only one salad left: rejected
+        entry("k3", [102, 102]),   # repeats a rejected first occurrence
+        entry("k4", [999]),        # unknown item
+    ]
+
+    def state():
+        return tuple(db.execute(text(query)).all() for query in (
+            "SELECT id, stock_quantity FROM menu_items ORDER BY id",
+            "SELECT order_id, item_id, qty FROM order_items ORDER BY order_id, item_id",
+            "SELECT user_id, date, order_count, calories, sugar, sodium FROM daily_nutrition ORDER BY user_id, date",
+            "SELECT bucket, orders, revenue, risk_alerts FROM site_counters ORDER BY bucket",
+        ))
+
+    catalog = MenuCatalog()
+    first = OrderService.create_orders_bulk(db, _User, batch, catalog)
+    statuses = [(r["client_key"], r["status"]) for r in first["results"]]
+    assert (first["created"], first["duplicates"], first["rejected"]) == (2, 1, 3), first
+    assert statuses == [("k1", "created"), ("k2", "created"), ("k1", "duplicate"),
+                        ("k3", "rejected"), ("k3", "rejected"), ("k4", "rejected")], statuses
+    order_ids = {r["client_key"]: r["order_id"] for r in first["results"] if r["status"] == "created"}
+    assert first["results"][2]["order_id"] == order_ids["k1"]
+    assert "out of stock" in first["results"][3]["detail"] and "Repeats" in first["results"][4]["detail"]
+    after_first = state()
+    assert after_first[0] == [(101, 7), (102, 1)]
+
+    # Replaying the same upload (e.g. after a lost response) creates nothing
+    replay = OrderService.create_orders_bulk(db, _User, batch, catalog)
+    assert replay["created"] == 0, replay
+    assert [r["status"] for r in replay["results"]] == ["duplicate", "duplicate", "duplicate", "rejected", "rejected", "rejected"]
+    assert [r["order_id"] for r in replay["results"][:3]] == [order_ids["k1"], order_ids["k2"], order_ids["k1"]]
+    assert state() == after_first, "replay changed stock, order_items or rollups"
+    assert db.execute(text("SELECT COUNT(*) FROM orders")).scalar() == 2
+
+    db.close()
+    engine.dispose()
+    print("Bulk Orders Passed! [OK]")
+
+def test_health_timeline_reads_are_idempotent():
+    print("--- Testing Health Timeline: repeated reads, rescoring after invalidate_from ---")
+    from datetime import datetime, timedelta
+    from models import HealthTimelinePoint, Order
+    from services.health_timeline import HealthTimeline, TIMELINE_MAX_DAYS
+    from services.nutrition_rollup import NutritionRollup
+    from services.order_service import OrderService
+
+    engine, Session = make_scratch_db("timeline.db")
+    db = Session()
+
+    def add_orders(orders):
+        db.add_all(orders)
+        db.flush()
+        NutritionRollup.record_orders(db, [OrderService.rollup_entry(o) for o in orders])
+        db.commit()
+
+    rng = random.Random(5)
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    add_orders([random_order(rng, 1, today - timedelta(days=day) + timedelta(hours=rng.randrange(8, 20))) for day in range(1, 11)])
+
+    # Count the days scored by each read (today is always scored live, never stored)
+    scored = []
+    score_day = HealthTimeline.score_day
+    def counting_score_day(*args, **kwargs):
+        scored.append(args)
+        return score_day(*args, **kwargs)
+    HealthTimeline.score_day = staticmethod(counting_score_day)
+
+    def stored_points():
+        return db.query(HealthTimelinePoint.date, HealthTimelinePoint.score, HealthTimelinePoint.event).filter(
+            HealthTimelinePoint.user_id == 1
+        ).order_by(HealthTimelinePoint.date).all()
+
+    try:
+        first = HealthTimeline.get_timeline(db, 1)
+        assert len(scored) == 11, len(scored)
+        points = stored_points()
+
+        # Repeated reads score nothing new and write nothing
+        del scored[:]
+        assert HealthTimeline.get_timeline(db, 1) == first
+        assert len(scored) == 1 and stored_points() == points
+
+        # A backdated order three days ago: only that day and later are rescored
+        day = (today - timedelta(days=3)).strftime("%Y-%m-%d")
+        add_orders([Order(user_id=1, items="[101]", total_price=10, total_calories=0, total_sugar=0, total_sodium=5000,
+                          created_at=today - timedelta(days=3) + timedelta(hours=12))])
+        HealthTimeline.invalidate_from(db, 1, day)
+        db.commit()
+        del scored[:]
+        after = HealthTimeline.get_timeline(db, 1)
+        assert len(scored) == 3 + 1, len(scored)
+        rescored = stored_points()
+        assert [p for p in rescored if p[0] < day] == [p for p in points if p[0] < day]
+        assert dict((p[0], p[2]) for p in rescored)[day] == "High Sodium Day"
+        assert after[:-4] == first[:-4] and after != first
+
+        # A user back after years away: only the last TIMELINE_MAX_DAYS are scored
+        long_ago = (today - timedelta(days=TIMELINE_MAX_DAYS + 500)).strftime("%Y-%m-%d")
+        db.add(HealthTimelinePoint(user_id=2, date=long_ago, score=80, event="Steady Day", profile_updated=0))
+        db.commit()
+        assert HealthTimeline.extend(db, 2, today.date()) == TIMELINE_MAX_DAYS
+    finally:
+        HealthTimeline.score_day = staticmethod(score_day)
+
+    db.close()
+    engine.dispose()
+    print("Health Timeline Passed! [OK]")
+
+def test_migrations_fresh_upgrade_and_rerun():
+    print("--- Testing Migrations: fresh database, upgrade from baseline, re-run ---")
+    import os
+    import tempfile
+    from sqlalchemy import create_engine, text
+    from database import Base
+    from migrations.runner import run_migrations, discover
+    from services.nutrition_rollup import NutritionRollup
+    from services.site_counters import SiteCounters
+
+    folder = tempfile.mkdtemp()
+
+    def engine_for(name):
+        return create_engine(f"sqlite:///{os.path.join(folder, name)}")
+
+    def schema(engine):
+        with engine.connect() as conn:
+            tables = [t for (t,) in conn.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name != 'schema_version' ORDER BY name"
+            ))]
+            return {
+                table: (
+                    sorted(tuple(row[1:]) for row in conn.execute(text(f"PRAGMA table_info({table})"))),
+                    sorted((row[1], row[2]) for row in conn.execute(text(f"PRAGMA index_list({table})"))
+                           if not row[1].startswith("sqlite_autoindex"))
+                )
+                for table in tables
+            }
+
+    def contents(engine):
+        with engine.connect() as conn:
+            return {
+                table: conn.execute(text(f"SELECT * FROM {table} ORDER BY 1, 2")).all()
+                for table in schema(engine)
+            }
+
+    migrations = discover()
+    latest = migrations[-1][0]
+
+    # Fresh database: the migrations alone produce exactly the current models' schema
+    fresh = engine_for("fresh.db")
+    assert run_migrations(fresh) == [number for number, _, _ in migrations]
+    models = engine_for("models.db")
+    Base.metadata.create_all(bind=models)
+    assert schema(fresh) == schema(models), "migrations and models disagree"
+
+    # Database from before migrations existed: baseline schema plus old-style data
+    old = engine_for("old.db")
+    with old.connect() as conn:
+        migrations[0][2].upgrade(conn)
+        conn.execute(text("INSERT INTO users (id, name, email) VALUES (1, 'Asha', 'asha@example.com')"))
+        conn.execute(text(
+            "INSERT INTO health_profiles (id, user_id, bmi, version) VALUES (1, 1, 31.0, NULL)"
+        ))
+        conn.execute(text(
+            "INSERT INTO orders (id, user_id, items, total_price, total_calories, total_sugar, total_sodium, created_at) VALUES "
+            "(1, 1, '[101, 101, 102]', 680, 1450, 18, 2550, '2026-01-05T09:30:00'), "
+            "(2, 1, '[{\"id\": 108}]', 150, 520, 45, 300, '2026-01-05 21:10:00'), "
+            "(3, 1, '[103]', 220, 850, 12, 1500, '2026-01-06T12:00:00')"
+        ))
+        conn.commit()
+    assert run_migrations(old) == [number for number, _, _ in migrations]
+    assert schema(old) == schema(models)
+    with old.connect() as conn:
+        assert conn.execute(text("SELECT bmi_category FROM health_profiles")).scalar() == "Obese"
+        assert conn.execute(text("SELECT COUNT(*) FROM orders WHERE created_at LIKE '%T%'")).scalar() == 0
+        assert conn.execute(text(
+            "SELECT order_id, item_id, qty, price FROM order_items ORDER BY order_id, item_id"
+        )).all() == [(1, 101, 2, 250.0), (1, 102, 1, 180.0), (2, 108, 1, 150.0), (3, 103, 1, 220.0)]
+        assert conn.execute(text(
+            "SELECT date, order_count, sodium FROM daily_nutrition ORDER BY date"
+        )).all() == [("2026-01-05", 2, 2850.0), ("2026-01-06", 1, 1500.0)]
+        # Jan 5 crosses the sodium limit on its first order and the sugar limit on its second
+        counters = "SELECT bucket, orders, revenue, risk_alerts FROM site_counters ORDER BY bucket"
+        built = conn.execute(text(counters)).all()
+        assert [(bucket, orders, alerts) for bucket, orders, _, alerts in built] == [
+            ("2026-01-05", 2, 2), ("2026-01-05 09", 1, 1), ("2026-01-05 21", 1, 1),
+            ("2026-01-06", 1, 0), ("2026-01-06 12", 1, 0)
+        ]
+        # The frozen backfill SQL still agrees with the live services
+        assert NutritionRollup.find_drift(conn) == []
+        SiteCounters.reconcile(conn)
+        assert conn.execute(text(counters)).all() == built
+
+    # Re-running changes nothing: the runner skips applied versions, and every
+    # migration run again by hand (as after an interruption) leaves the data as it was
+    for engine in (fresh, old):
+        before = contents(engine)
+        assert run_migrations(engine) == []
+        with engine.connect() as conn:
+            for _, _, module in migrations:
+                module.upgrade(conn)
+                conn.commit()
+            assert conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() == latest
+        assert contents(engine) == before, "re-running a migration changed data"
+        engine.dispose()
+    models.dispose()
+
+    print("Migrations Passed! [OK]")
+
 if __name__ == "__main__":
     try:
         test_phase_1_risk_scoring()
         test_phase_2_and_6_hybrid_ml_and_stock()
+        test_batch_scoring_matches_per_item()
+        test_keyword_matcher_matches_substring_scan()
+        test_recommendation_cache_invalidation()
+        test_profile_etag_conditional_get()
+        test_menu_catalog_shared_version()
+        test_token_cache_and_current_user()
+        test_rate_limiter_window_boundary()
+        test_sql_nutrition_aggregation_matches_python()
+        test_site_counters_match_reconcile()
+        test_health_timeline_reads_are_idempotent()
+        test_bulk_order_replay_is_idempotent()
+        test_migrations_fresh_upgrade_and_rerun()
         print("\nAll Core Architectural Tests Passed Successfully! System is Production Ready.")
     except Exception as e:
         print(f"\n[X] Test Failed: {e}")